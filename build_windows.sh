@@ -54,6 +54,7 @@ echo ">> Installing/upgrading build dependencies (into the Windows Python)…"
 # --collect-all customtkinter is REQUIRED: CTk ships theme/asset data files
 # that PyInstaller misses otherwise, which crashes the exe at startup.
 # --windowed hides the console window (GUI app).
+# --add-data ships the help text GitHerd reads through importlib.resources.
 echo ">> Building GitHerd.exe…"
 "$PYWIN" -m PyInstaller \
     --noconfirm \
@@ -61,6 +62,7 @@ echo ">> Building GitHerd.exe…"
     --windowed \
     --name GitHerd \
     --collect-all customtkinter \
+    --add-data "githerd_pkg/help.txt:githerd_pkg" \
     main.py
 
 echo
@@ -5,23 +5,44 @@ GitHerd — App core mixin.
 Handles initialization, lifecycle, and basic window management.
 """
 
+import os
 import queue
+import shutil
 import subprocess
 import threading
-from collections import deque
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
 from datetime import datetime
 import customtkinter as ctk
 
-from ..config import load_global_settings, save_global_settings
+from ..config import load_global_settings, save_global_settings, STATE_CACHE_FILE
+from ..git_utils import git_common_dir, run_git, invalidate_read_cache
+from ..state_cache import StateCache
+from ..watcher import RefWatcher
+from ..workers import DaemonPool
 
 
 class AppCoreMixin:
     """Mixin for app initialization and lifecycle."""
 
+    # Looked up once: without wmctrl, always-on-top is Tk's -topmost only
+    _WMCTRL = shutil.which("wmctrl")
+
     def _init_state(self):
         """Initialize application state."""
         self.tabs = {}  # tab_name -> RepoTabContent
         self.tab_paths = {}  # tab_name -> repo_path
+        self._pending_color_tabs = set()  # tabs waiting for _flush_tab_colors
+        self._color_flush_scheduled = False
+        self.repo_menu = None  # built by _build_menus
+        self._repo_menu_update_pending = False  # see schedule_repo_menu_update
+        self._settings_dirty = False  # see _mark_settings_dirty
+        self._settings_flush_scheduled = False
+        self._path_to_tab = {}  # normalized repo_path -> tab_name (see _set_tab_path)
+        self._name_counts = Counter()  # folder name -> open tabs named after it
+        self._tab_name_base = {}  # tab_name -> folder name it was derived from
+        self._display_names = {}  # repo_path -> alias or folder name (see get_tab_display_name)
         self.global_settings = load_global_settings()
         self.tab_buttons = {}
         self.tab_frames = {}
@@ -31,6 +52,28 @@ class AppCoreMixin:
         # is not thread-safe in this Tcl/Tk build (createcommand requires
         # the main thread).
         self._ui_queue = queue.Queue()
+        # Shared workers for the jobs of every tab (initial scan, polling
+        # and manual syncs, merges, retry, idle watch, sounds) instead of
+        # one thread each. Polling waits are Tk timers, not threads: a
+        # polling tab only holds a worker while it actually syncs.
+        # Daemon workers (see workers.py): quitting never waits on a job.
+        self.pool = DaemonPool(max_workers=8, thread_name_prefix="githerd")
+        # Per-branch read queries (counts, diffs) of every tab, fanned out
+        # by the jobs above. A separate pool: a job waiting on its
+        # queries must never hold the worker they'd need. Tasks here
+        # never submit to it themselves.
+        self.git_pool = DaemonPool(
+            max_workers=min(16, (os.cpu_count() or 4) * 2),
+            thread_name_prefix="githerd-git"
+        )
+        # inotify on local refs (Linux, optional): immediate sync on commit
+        self.ref_watcher = RefWatcher(self)
+        # Counts / changed files of (main, tip) pairs, kept across runs
+        self.state_cache = StateCache(STATE_CACHE_FILE)
+        # Fetches shared by tabs on one repository (see fetch_remote)
+        self._fetch_lock = threading.Lock()
+        self._fetch_inflight = {}  # (common git dir, remote) -> Future
+        self._fetch_done = {}  # (common git dir, remote) -> (monotonic time, repo path, result)
         # Global rolling list of meaningful sync events across all repos.
         # Each entry: (datetime, repo_alias, message). Newest first.
         self._recent_events_limit = max(1, int(self.global_settings.get("recent_sync_limit", 5)))
@@ -48,9 +91,98 @@ class AppCoreMixin:
         Call this from any thread to marshal a UI update onto the main
         loop. Exceptions raised by fn() are swallowed to keep the
         drainer alive.
+
+        Called on the main thread itself (menu actions, the drainer's
+        own callbacks), fn() runs right away instead of waiting up to
+        one drain period, unless updates are still queued: those were
+        requested first and must not land on top of this one.
         """
+        if threading.current_thread() is threading.main_thread() \
+                and self._ui_queue.empty():
+            try:
+                fn()
+            except Exception:
+                pass
+            return
         self._ui_queue.put(fn)
 
+    def fetch_remote(self, tab):
+        """`git fetch <remote>` for tab; returns run_git's (code, out, err).
+
+        Tabs opened on linked worktrees of one repository share its refs,
+        so one fetch serves them all: a tab asking while another one's
+        fetch of the same remote is running waits for it and takes its
+        result, and a successful fetch made by another tab less than
+        half this tab's interval ago is reused. A tab's own fetches are
+        never skipped (a manual sync right after a poll fetches again).
+        """
+        key = (git_common_dir(tab.repo_path) or str(tab.repo_path), tab.remote)
+        with self._fetch_lock:
+            fut = self._fetch_inflight.get(key)
+            if fut is None:
+                done = self._fetch_done.get(key)
+                if done is not None and done[1] != str(tab.repo_path) \
+                        and time.monotonic() - done[0] < tab.interval / 2:
+                    invalidate_read_cache(tab.repo_path)
+                    return done[2]
+                fut = self._fetch_inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            result = fut.result()
+            invalidate_read_cache(tab.repo_path)
+            return result
+        try:
+            result = run_git([tab.git, "fetch", tab.remote], cwd=tab.repo_path)
+        except BaseException as e:
+            with self._fetch_lock:
+                del self._fetch_inflight[key]
+            fut.set_exception(e)
+            raise
+        with self._fetch_lock:
+            del self._fetch_inflight[key]
+            if result[0] == 0:
+                self._fetch_done[key] = (time.monotonic(), str(tab.repo_path), result)
+        fut.set_result(result)
+        return result
+
+    def when_polling_idle(self, callback):
+        """Run callback() on the main thread as soon as no tab has a
+        polling sync in flight (right away if none has).
+
+        Each in-flight sync signals its own completion; the last one to
+        finish queues the callback, instead of the UI re-checking every
+        few hundred milliseconds.
+        """
+        lock = threading.Lock()
+        pending = [1]  # held until every tab is registered
+
+        def one_done():
+            with lock:
+                pending[0] -= 1
+                last = pending[0] == 0
+            if last:
+                self.ui_call(callback)
+
+        for tab in list(self.tabs.values()):
+            with lock:
+                pending[0] += 1
+            if not tab.when_poll_done(one_done):
+                with lock:
+                    pending[0] -= 1
+        one_done()
+
+    def run_in_worker(self, work, on_done=None):
+        """Run work() on the shared pool, then on_done(result) on the
+        main thread. For git calls triggered from the UI: the window
+        keeps redrawing while git forks and talks to the remote."""
+        def job():
+            result = work()
+            if on_done is not None:
+                self.ui_call(lambda: on_done(result))
+        return self.pool.submit(job)
+
     def _drain_ui_queue(self):
         """Runs on the main thread via after(). Drains pending UI calls."""
         try:
@@ -207,13 +339,21 @@ class AppCoreMixin:
     def set_always_on_top(self):
         """Set window to always be on top."""
         self.attributes("-topmost", True)
+        if self._WMCTRL is None:
+            return
+        # Spawning wmctrl would stall the Tk loop: run it on the pool
+        self.pool.submit(self._run_wmctrl_above, self.title())
+
+    def _run_wmctrl_above(self, title):
+        """Ask the window manager to keep the window above (worker thread)."""
         try:
             subprocess.run(
-                ["wmctrl", "-r", self.title(), "-b", "add,above"],
+                [self._WMCTRL, "-r", title, "-b", "add,above"],
                 stderr=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL
+                stdout=subprocess.DEVNULL,
+                timeout=10
             )
-        except FileNotFoundError:
+        except (OSError, subprocess.SubprocessError):
             pass
 
     def ensure_dialog_on_screen(self, dialog):
@@ -287,7 +427,7 @@ class AppCoreMixin:
 
         if stopped > 0:
             from tkinter import messagebox
-            self.after(100, lambda: messagebox.showinfo(
+            self.after_idle(lambda: messagebox.showinfo(
                 "Polling stopped",
                 f"{stopped} polling(s) stopped.",
                 parent=self
@@ -325,6 +465,8 @@ class AppCoreMixin:
 
     def _set_suspend_menu_label(self, label):
         """Update the File menu's suspend/restore entry label."""
+        if self.repo_menu is None:
+            return  # menus not (re)built yet: _build_menus reads the flag
         try:
             self._file_menu.entryconfigure(self._suspend_menu_index, label=label)
         except Exception:
@@ -348,8 +490,14 @@ class AppCoreMixin:
 
         # Wait for all threads to finish
         for tab in self.tabs.values():
-            tab.wait_for_polling_thread(timeout=30)
-
+            tab.wait_for_polling_sync(timeout=30)
+
+        # Drop queued jobs; one still running is abandoned at exit
+        # (daemon workers, see workers.py)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.git_pool.shutdown(wait=False, cancel_futures=True)
+        self.ref_watcher.close()
+        self.state_cache.close()
         self.destroy()
 
     def get_current_tab(self):
@@ -12,8 +12,8 @@ from ..config import (
     load_global_settings, save_global_settings,
     APPEARANCE_MODES, COLOR_THEMES
 )
-from ..git_utils import get_tracked_branches, delete_remote_branch
-from ..resources import HELP_TEXT
+from ..git_utils import delete_remote_branch
+from ..resources import help_text
 
 
 class AppDialogsMixin:
@@ -233,6 +233,13 @@ class AppDialogsMixin:
         watch_idle_entry.grid(row=arow, column=1, sticky="w", pady=6)
         arow += 1
 
+        ctk.CTkLabel(autof, text="Slow down idle polling up to (sec, 0=off):").grid(
+            row=arow, column=0, sticky="w", pady=6)
+        backoff_entry = ctk.CTkEntry(autof, width=80)
+        backoff_entry.insert(0, str(self.global_settings.get("idle_backoff_max_seconds", 900)))
+        backoff_entry.grid(row=arow, column=1, sticky="w", pady=6)
+        arow += 1
+
         ctk.CTkLabel(autof, text="Disable polling after inactivity (hours, 0=off):",
                      text_color="#e05555").grid(row=arow, column=0, sticky="w", pady=6)
         inactivity_entry = ctk.CTkEntry(autof, width=80)
@@ -281,6 +288,11 @@ class AppDialogsMixin:
             except (ValueError, AttributeError):
                 new_watch_idle = 0
             self.global_settings["watch_idle_interval_seconds"] = new_watch_idle
+            try:
+                new_backoff = max(0, int(backoff_entry.get().strip()))
+            except (ValueError, AttributeError):
+                new_backoff = 900
+            self.global_settings["idle_backoff_max_seconds"] = new_backoff
             try:
                 new_inactivity = max(0, float(inactivity_entry.get().strip()))
             except (ValueError, AttributeError):
@@ -378,7 +390,7 @@ class AppDialogsMixin:
 
         text = ctk.CTkTextbox(help_win, font=ctk.CTkFont(family="Consolas", size=12))
         text.pack(fill="both", expand=True, padx=10, pady=10)
-        text.insert("1.0", HELP_TEXT)
+        text.insert("1.0", help_text())
         text.configure(state="disabled")
 
         ctk.CTkButton(help_win, text="Close", command=help_win.destroy).pack(pady=10)
@@ -446,11 +458,9 @@ class AppDialogsMixin:
         Save/Cancel/Delete buttons into `btn_frame`.
         """
         try:
-            branches = get_tracked_branches(tab.remote, tab.prefix,
-                                            cwd=tab.repo_path, git=tab.git)
+            short_names = tab.tracked_short_names()
         except Exception:
-            branches = []
-        short_names = [b.replace(f"{tab.remote}/", "") for b in branches]
+            short_names = ()
         if not short_names:
             messagebox.showinfo(
                 "No branches",
@@ -574,7 +584,7 @@ class AppDialogsMixin:
             for name, var in vars_by_name.items():
                 repo_states[name] = bool(var.get())
             save_global_settings(s)
-            self.update_repo_menu()
+            self.schedule_repo_menu_update()
             dialog.destroy()
 
         ctk.CTkButton(btn_frame, text="Save", command=save).pack(
@@ -625,21 +635,29 @@ class AppDialogsMixin:
                     parent=dialog,
                 ):
                     return
-            errors = 0
-            for name in selected:
-                tab.log_msg(f"Deleting {name}…")
-                ok, err = delete_remote_branch(
-                    name, tab.remote, cwd=tab.repo_path, git=tab.git
-                )
-                if ok:
-                    tab.log_msg(f"Branch {name} deleted")
-                else:
-                    tab.log_msg(f"Error deleting {name}: {err}")
-                    errors += 1
-            self.update_repo_menu()
             dialog.destroy()
-            if errors == 0:
-                tab.manual_sync()
+
+            def delete_all():
+                errors = 0
+                for name in selected:
+                    tab.log_msg(f"Deleting {name}…")
+                    ok, err = delete_remote_branch(
+                        name, tab.remote, cwd=tab.repo_path, git=tab.git
+                    )
+                    if ok:
+                        tab.log_msg(f"Branch {name} deleted")
+                    else:
+                        tab.log_msg(f"Error deleting {name}: {err}")
+                        errors += 1
+                return errors
+
+            def done(errors):
+                tab.invalidate_branches()
+                self.schedule_repo_menu_update()
+                if errors == 0:
+                    tab.manual_sync()
+
+            self.run_in_worker(delete_all, done)
 
         ctk.CTkButton(
             btn_frame, text="Delete selected", command=do_delete,
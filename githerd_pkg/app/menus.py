@@ -5,11 +5,29 @@ GitHerd — App menus mixin.
 Handles menu creation and updates.
 """
 
+from functools import partial
+from types import MappingProxyType
 import tkinter as tk
 import tkinter.font as tkfont
 import customtkinter as ctk
 
-from ..git_utils import get_tracked_branches
+# Menu colors per effective appearance (shared, read-only: also handed
+# out as App.menu_colors to the context menus)
+_PALETTES = {
+    "dark": MappingProxyType({
+        "bg": "#2b2b2b", "fg": "#ffffff", "active_bg": "#404040", "active_fg": "#ffffff",
+    }),
+    "light": MappingProxyType({
+        "bg": "#f0f0f0", "fg": "#000000", "active_bg": "#0078d4", "active_fg": "#ffffff",
+    }),
+}
+
+
+def _menu_palette(mode):
+    """Colors for appearance mode ("dark", "light" or "system")."""
+    if mode == "dark" or (mode == "system" and ctk.get_appearance_mode() == "Dark"):
+        return _PALETTES["dark"]
+    return _PALETTES["light"]
 
 
 class AppMenusMixin:
@@ -20,20 +38,15 @@ class AppMenusMixin:
         # Calculate menu font size based on font_zoom
         font_zoom = self.global_settings.get("font_zoom", 1.0)
         menu_font_size = int(10 * font_zoom)
-        menu_font = tkfont.Font(family="sans-serif", size=menu_font_size)
+        # A UI rebuild keeps the font unless the zoom changed
+        menu_font = getattr(self, "menu_font", None)
+        if menu_font is None or menu_font.cget("size") != menu_font_size:
+            menu_font = tkfont.Font(family="sans-serif", size=menu_font_size)
 
         # Colors based on appearance mode
-        appearance = self.global_settings.get("appearance_mode", "dark")
-        if appearance == "dark" or (appearance == "system" and ctk.get_appearance_mode() == "Dark"):
-            menu_bg = "#2b2b2b"
-            menu_fg = "#ffffff"
-            menu_active_bg = "#404040"
-            menu_active_fg = "#ffffff"
-        else:
-            menu_bg = "#f0f0f0"
-            menu_fg = "#000000"
-            menu_active_bg = "#0078d4"
-            menu_active_fg = "#ffffff"
+        palette = _menu_palette(self.global_settings.get("appearance_mode", "dark"))
+        menu_bg, menu_fg = palette["bg"], palette["fg"]
+        menu_active_bg, menu_active_fg = palette["active_bg"], palette["active_fg"]
 
         self.menubar = tk.Menu(self, font=menu_font, bg=menu_bg, fg=menu_fg,
                                activebackground=menu_active_bg, activeforeground=menu_active_fg)
@@ -63,11 +76,15 @@ class AppMenusMixin:
                              accelerator="Ctrl+R")
         file_menu.add_command(label="Quit", command=self.on_close, accelerator="Ctrl+Q")
 
-        # Repository menu (dynamically updated)
+        # Repository menu (dynamically updated). postcommand brings it up
+        # to date right before it is shown, so background syncs don't
+        # have to refresh a menu nobody is looking at.
+        self._repo_menu_sig = ()  # nothing built yet, see update_repo_menu
         self.repo_menu = tk.Menu(self.menubar, tearoff=0, font=menu_font, bg=menu_bg, fg=menu_fg,
-                                activebackground=menu_active_bg, activeforeground=menu_active_fg)
+                                activebackground=menu_active_bg, activeforeground=menu_active_fg,
+                                postcommand=self.update_repo_menu)
         self.menu_font = menu_font
-        self.menu_colors = {"bg": menu_bg, "fg": menu_fg, "active_bg": menu_active_bg, "active_fg": menu_active_fg}
+        self.menu_colors = palette
         self.menubar.add_cascade(label="\u00a0\u00a0\u00a0Repository\u00a0\u00a0\u00a0", menu=self.repo_menu)
 
         # ? menu (Options + Help)
@@ -79,6 +96,9 @@ class AppMenusMixin:
         help_menu.add_command(label="Help", command=self.show_help)
         help_menu.add_command(label="About GitHerd", command=self.show_about)
 
+        # Kept for update_menu_colors: no walking the menubar through Tcl
+        self._submenus = (file_menu, self.repo_menu, help_menu)
+
         # Keyboard shortcuts
         self.bind("<Control-o>", lambda e: self.add_repo_dialog())
         self.bind("<Control-s>", lambda e: self.stop_all_polling())
@@ -90,35 +110,69 @@ class AppMenusMixin:
         if mode is None:
             mode = self.global_settings.get("appearance_mode", "dark")
 
-        if mode == "dark" or (mode == "system" and ctk.get_appearance_mode() == "Dark"):
-            menu_bg = "#2b2b2b"
-            menu_fg = "#ffffff"
-            menu_active_bg = "#404040"
-            menu_active_fg = "#ffffff"
-        else:
-            menu_bg = "#f0f0f0"
-            menu_fg = "#000000"
-            menu_active_bg = "#0078d4"
-            menu_active_fg = "#ffffff"
+        palette = _menu_palette(mode)
+        if self.repo_menu is None:
+            return  # menus are being rebuilt; _build_menus picks the mode
+        menu_bg, menu_fg = palette["bg"], palette["fg"]
+        menu_active_bg, menu_active_fg = palette["active_bg"], palette["active_fg"]
 
         # Update menubar and all submenus
         self.menubar.configure(bg=menu_bg, fg=menu_fg,
                               activebackground=menu_active_bg, activeforeground=menu_active_fg)
-        for i in range(self.menubar.index("end") + 1):
-            try:
-                submenu = self.menubar.nametowidget(self.menubar.entrycget(i, "menu"))
-                submenu.configure(bg=menu_bg, fg=menu_fg,
-                                 activebackground=menu_active_bg, activeforeground=menu_active_fg)
-            except:
-                pass
+        for submenu in self._submenus:
+            submenu.configure(bg=menu_bg, fg=menu_fg,
+                              activebackground=menu_active_bg, activeforeground=menu_active_fg)
 
-        self.menu_colors = {"bg": menu_bg, "fg": menu_fg, "active_bg": menu_active_bg, "active_fg": menu_active_fg}
+        self.menu_colors = palette
+
+    def schedule_repo_menu_update(self):
+        """Refresh the Repository menu once the event loop is idle.
+
+        Tab switches, hides and restores often come in bursts (startup,
+        rebuild, several repos restored at once): they each mark the menu
+        dirty and it is refreshed a single time afterwards.
+        """
+        if not self._repo_menu_update_pending:
+            self._repo_menu_update_pending = True
+            self.after_idle(self._flush_repo_menu_update)
+
+    def _flush_repo_menu_update(self):
+        self._repo_menu_update_pending = False
+        self.update_repo_menu()
 
     def update_repo_menu(self):
-        """Rebuild the Repository menu for current tab."""
+        """Rebuild the Repository menu for current tab.
+
+        Runs each time the menu opens (postcommand) and on tab changes,
+        so it first compares a signature of what the menu shows (tab,
+        its state, whether it has branches, the inactive repos):
+        unchanged means Tk isn't touched at all.
+        When only the tab or its state changed, the existing entries are
+        reconfigured in place; the menu is only rebuilt when its
+        structure (no tab / inactive submenu) changes.
+        """
+        if self.repo_menu is None:
+            return  # not built yet (rebuild_ui builds it on idle)
+        tab = self.get_current_tab()
+        hidden_repos = self.global_settings.get("hidden_repos", [])
+        if tab:
+            # Only the cached list: no git call on the UI thread. Until
+            # a branch scan fills it, branch entries stay disabled.
+            has_branches = tab.has_tracked_branches()
+            hidden = tuple((rp, self.get_tab_display_name(rp)) for rp in hidden_repos)
+            sig = (tab, tab.git_healthy, tab.polling, has_branches, hidden)
+        else:
+            sig = None
+
+        prev, self._repo_menu_sig = self._repo_menu_sig, sig
+        if sig == prev:
+            return
+        if sig and prev and sig[4] == prev[4]:
+            self._configure_repo_menu_entries(tab, has_branches)
+            return
+
         self.repo_menu.delete(0, "end")
 
-        tab = self.get_current_tab()
         if not tab:
             self.repo_menu.add_command(label="(no repository)", state="disabled")
             return
@@ -144,23 +198,16 @@ class AppMenusMixin:
 
         self.repo_menu.add_separator()
 
-        # List branches matching prefix
-        try:
-            branches = get_tracked_branches(tab.remote, tab.prefix,
-                                           cwd=tab.repo_path, git=tab.git)
-        except:
-            branches = []
-
         # Branch operations: open the two dedicated dialogs.
         self.repo_menu.add_command(
             label="Sync branches…",
-            command=lambda t=tab: self.show_branch_sync_dialog(t),
-            state="normal" if branches else "disabled",
+            command=partial(self.show_branch_sync_dialog, tab),
+            state="normal" if has_branches else "disabled",
         )
         self.repo_menu.add_command(
             label="Delete branches…",
-            command=lambda t=tab: self.show_branch_delete_dialog(t),
-            state="normal" if branches else "disabled",
+            command=partial(self.show_branch_delete_dialog, tab),
+            state="normal" if has_branches else "disabled",
         )
         self.repo_menu.add_separator()
 
@@ -168,7 +215,6 @@ class AppMenusMixin:
         self.repo_menu.add_command(label="Close", command=self.close_current_tab)
 
         # Inactive repos submenu
-        hidden_repos = self.global_settings.get("hidden_repos", [])
         if hidden_repos:
             self.repo_menu.add_separator()
             inactive_menu = tk.Menu(
@@ -181,10 +227,28 @@ class AppMenusMixin:
                 display_name = self.get_tab_display_name(repo_path)
                 inactive_menu.add_command(
                     label=display_name,
-                    command=lambda rp=repo_path: self.show_repo(rp)
+                    command=partial(self.show_repo, repo_path)
                 )
             self.repo_menu.add_cascade(
                 label=f"Inactive repos ({len(hidden_repos)})",
                 menu=inactive_menu
             )
 
+    def _configure_repo_menu_entries(self, tab, has_branches):
+        """Point the per-tab Repository menu entries at another tab / state
+        in place (indices follow the layout built by update_repo_menu)."""
+        healthy = "normal" if tab.git_healthy else "disabled"
+        branch_state = "normal" if has_branches else "disabled"
+        self.repo_menu.entryconfigure(0, command=tab.show_config_dialog)
+        self.repo_menu.entryconfigure(1, command=tab.open_folder)
+        self.repo_menu.entryconfigure(3, command=tab.manual_sync, state=healthy)
+        self.repo_menu.entryconfigure(
+            4, label="Stop polling" if tab.polling else "Start polling",
+            command=tab.toggle_polling, state=healthy
+        )
+        self.repo_menu.entryconfigure(
+            6, command=partial(self.show_branch_sync_dialog, tab), state=branch_state
+        )
+        self.repo_menu.entryconfigure(
+            7, command=partial(self.show_branch_delete_dialog, tab), state=branch_state
+        )
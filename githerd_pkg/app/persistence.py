@@ -5,7 +5,6 @@ GitHerd — App persistence mixin.
 Handles loading/saving repos, window state, rebuild UI, and restart.
 """
 
-import re
 import sys
 import os
 import subprocess
@@ -19,6 +18,10 @@ from ..config import (
     apply_theme_settings
 )
 from ..git_utils import is_git_repo
+from ..workers import DaemonPool
+
+# Delay before a batch of settings changes is written (_mark_settings_dirty)
+SETTINGS_FLUSH_MS = 500
 
 
 class AppPersistenceMixin:
@@ -35,19 +38,19 @@ class AppPersistenceMixin:
         drop it from persistence.
         """
         repos = load_repos_from_file()
-        git = self.global_settings.get("git_binary", "git")
         hidden_repos = self.global_settings.get("hidden_repos", [])
         # Repos present in repos.json but not turned into a live tab this
         # session (missing folder, not a git repo, or an open error).
         # Preserved so a later save keeps them in the file.
         self._unloaded_repos = []
-        for repo_path in repos:
-            # Skip hidden (inactive) repos — they stay in persistence via
-            # the hidden_repos list, not via _unloaded_repos.
-            if repo_path in hidden_repos:
-                continue
+        # Skip hidden (inactive) repos — they stay in persistence via
+        # the hidden_repos list, not via _unloaded_repos.
+        repos = [p for p in repos if p not in hidden_repos]
+
+        # Tabs are created here on the Tk thread, in saved order
+        for repo_path, valid in self._check_repos(repos):
             try:
-                if Path(repo_path).exists() and is_git_repo(repo_path, git):
+                if valid:
                     self.add_repo(repo_path, switch_to=False)
                 else:
                     # Folder gone / not a git repo right now: keep the
@@ -82,6 +85,30 @@ class AppPersistenceMixin:
         self.after(100, restore_tab)
         self.after(200, restore_polling)
 
+    def _check_repos(self, repos):
+        """[(repo_path, is a usable git repo)] for repos, in order.
+
+        The checks are stats (and maybe a git call) per repo: on a
+        network home they're run side by side, on a throwaway pool of
+        their own. On self.pool they could queue behind running syncs
+        while the Tk thread waits for their results.
+        """
+        if not repos:
+            return []
+        git = self.global_settings.get("git_binary", "git")
+
+        def is_valid(repo_path):
+            try:
+                return os.path.isdir(repo_path) and is_git_repo(repo_path, git)
+            except Exception:
+                return False
+
+        pool = DaemonPool(max_workers=min(8, len(repos)), thread_name_prefix="githerd_check")
+        try:
+            return list(zip(repos, pool.map(is_valid, repos)))
+        finally:
+            pool.shutdown(wait=False)
+
     def save_current_repos(self):
         """Save list of repositories to repos.json.
 
@@ -93,24 +120,31 @@ class AppPersistenceMixin:
         "far fewer repos than before" data loss happened.
         """
         repos = list(self.tab_paths.values())
-        hidden_repos = self.global_settings.get("hidden_repos", [])
-        for hidden in hidden_repos:
-            if hidden not in repos:
-                repos.append(hidden)
-        for unloaded in getattr(self, "_unloaded_repos", []):
-            if unloaded not in repos:
-                repos.append(unloaded)
+        seen = set(repos)
+        for extra in (self.global_settings.get("hidden_repos", ()),
+                      getattr(self, "_unloaded_repos", ())):
+            for repo_path in extra:
+                if repo_path not in seen:
+                    seen.add(repo_path)
+                    repos.append(repo_path)
         save_repos(repos)
 
     def save_window_state(self):
         """Save window position and state for restart."""
         self.update_idletasks()
         geom = self.geometry()
-        match = re.match(r"(\d+)x(\d+)\+(-?\d+)\+(-?\d+)", geom)
-        if match:
-            self.global_settings["window_width"] = int(match.group(1))
-            self.global_settings["window_x"] = int(match.group(3))
-            self.global_settings["window_y"] = int(match.group(4))
+        # Tk always reports "WxH+X+Y" (a negative offset as "+-N")
+        size, _, pos = geom.partition("+")
+        x, _, y = pos.partition("+")
+        try:
+            width = int(size.partition("x")[0])
+            x, y = int(x), int(y)
+        except ValueError:
+            pass
+        else:
+            self.global_settings["window_width"] = width
+            self.global_settings["window_x"] = x
+            self.global_settings["window_y"] = y
 
         # Save collapsed state based on current tab
         if self.current_tab and self.current_tab in self.tabs:
@@ -126,7 +160,28 @@ class AppPersistenceMixin:
                 polling_states[repo_path] = tab.polling
         self.global_settings["polling_states"] = polling_states
 
+        # Writes the whole dict: covers any change still waiting in
+        # _mark_settings_dirty's delayed save
         save_global_settings(self.global_settings)
+        self._settings_dirty = False
+
+    def _mark_settings_dirty(self):
+        """Save global settings shortly, once for a burst of changes.
+
+        Hiding several repos or renaming tabs in a row would otherwise
+        encode and write settings.json each time. Exit paths go through
+        save_window_state, which saves synchronously.
+        """
+        self._settings_dirty = True
+        if not self._settings_flush_scheduled:
+            self._settings_flush_scheduled = True
+            self.after(SETTINGS_FLUSH_MS, self._flush_settings)
+
+    def _flush_settings(self):
+        self._settings_flush_scheduled = False
+        if self._settings_dirty:
+            self._settings_dirty = False
+            save_global_settings(self.global_settings)
 
     def rebuild_ui(self):
         """Rebuild UI without restarting process."""
@@ -145,14 +200,6 @@ class AppPersistenceMixin:
                 tab.stop_countdown()
 
         def do_rebuild():
-            any_alive = any(
-                tab.polling_thread and tab.polling_thread.is_alive()
-                for tab in self.tabs.values()
-            )
-            if any_alive:
-                self.after(200, do_rebuild)
-                return
-
             # Hide window during rebuild
             self.withdraw()
 
@@ -163,9 +210,13 @@ class AppPersistenceMixin:
             # Reset structures
             self.tabs = {}
             self.tab_paths = {}
+            self._path_to_tab = {}
+            self._name_counts.clear()
+            self._tab_name_base = {}
             self.tab_buttons = {}
             self.tab_frames = {}
             self.current_tab = None
+            self.repo_menu = None  # destroyed above, rebuilt on idle
 
             # Apply new theme
             apply_theme_settings()
@@ -175,8 +226,9 @@ class AppPersistenceMixin:
             ctk.set_widget_scaling(font_zoom)
             ctk.set_window_scaling(font_zoom)
 
-            # Rebuild menus
-            self._build_menus()
+            # Rebuild menus once the tabs are back: nothing below needs
+            # them, and the window content shows up a little sooner
+            self.after_idle(self._build_menus)
 
             # Recreate tab bar
             self.tab_bar = ctk.CTkFrame(self, height=40)
@@ -186,10 +238,9 @@ class AppPersistenceMixin:
             self.content_container = ctk.CTkFrame(self)
             self.content_container.pack(fill="both", expand=True, padx=10, pady=(5, 10))
 
-            # Reload repos
-            git = self.global_settings.get("git_binary", "git")
-            for repo_path in saved_repos:
-                if Path(repo_path).exists() and is_git_repo(repo_path, git):
+            # Reload repos, checked as in load_saved_repos
+            for repo_path, valid in self._check_repos(saved_repos):
+                if valid:
                     self.add_repo(repo_path)
 
             # Restore active tab
@@ -200,14 +251,16 @@ class AppPersistenceMixin:
                     first_tab = list(self.tabs.keys())[0]
                     self.switch_tab(first_tab)
 
-            self.after(100, restore)
+            self.after_idle(restore)
 
-            # Restore geometry and show window
+            # Restore geometry and show window. No update_idletasks():
+            # the freshly built tabs are laid out by the event loop
+            # rather than in one blocking pass before the window shows;
+            # the geometry request is applied when the window maps.
             self.geometry(saved_geometry)
-            self.update_idletasks()
             self.deiconify()
 
-        do_rebuild()
+        self.when_polling_idle(do_rebuild)
 
     def restart_app(self):
         """Restart the application."""
@@ -253,21 +306,14 @@ class AppPersistenceMixin:
                         tab.stop_event.set()
                         tab.stop_countdown()
 
-                def wait_and_restart():
-                    any_alive = any(
-                        tab.polling_thread and tab.polling_thread.is_alive()
-                        for tab in self.tabs.values()
-                    )
-                    if any_alive:
-                        self.after(500, wait_and_restart)
-                    else:
-                        python = sys.executable
-                        script = os.path.abspath(sys.argv[0])
-                        self.destroy()
-                        subprocess.Popen([python, script])
-                        sys.exit(0)
-
-                wait_and_restart()
+                def restart():
+                    python = sys.executable
+                    script = os.path.abspath(sys.argv[0])
+                    self.destroy()
+                    subprocess.Popen([python, script])
+                    sys.exit(0)
+
+                self.when_polling_idle(restart)
 
             ctk.CTkButton(btn_frame, text="Cancel", width=100,
                          command=dialog.destroy).pack(side="left", padx=10)
@@ -5,7 +5,7 @@ GitHerd — App tabs mixin.
 Handles tab management, switching, and colors.
 """
 
-import threading
+from functools import partial
 from pathlib import Path
 import customtkinter as ctk
 
@@ -13,25 +13,42 @@ from ..config import (
     load_global_settings, save_global_settings, load_repo_config,
     save_repo_config
 )
-from ..git_utils import is_git_repo, detect_repo_settings
+from ..git_utils import (
+    is_git_repo, detect_repo_settings, GitSession, unregister_repo_env
+)
 from ..widgets import TabButton
 from ..repo_tab import RepoTabContent
 
 
+def _norm_repo_path(p):
+    """Comparable form of a repo path: symlinks resolved, no trailing slash."""
+    try:
+        return str(Path(p).resolve())
+    except Exception:
+        return str(p).rstrip("/\\")
+
+
+# Tab background state, indexed by
+#   (broken: git unhealthy or sync error) << 2 | pending merge << 1 | polling
+# broken is always red; otherwise polling is green, a pending merge
+# without polling (a STOP) is red, and a plain stopped tab is default.
+_BG_STATES = ("default", "green", "red", "green", "red", "red", "red", "red")
+
+# bg state -> (fg_color, hover_color) of the tab button
+_BG_COLORS = {
+    "green": ("#2d5a2d", "#3d7a3d"),
+    "red": ("#8b2020", "#ab3030"),
+    "default": ("#3d3d3d", "#4a4a4a"),
+}
+
+
 class AppTabsMixin:
     """Mixin for tab management."""
 
     def get_tab_bg_state(self, tab):
-        """Return background state for tab."""
-        if not tab.git_healthy:
-            return "red"
-        if getattr(tab, "sync_error", False):
-            return "red"
-        if tab.pending_branches and not tab.polling:
-            return "red"
-        if tab.polling:
-            return "green"
-        return "default"
+        """Return background state for tab ("red", "green" or "default")."""
+        broken = not tab.git_healthy or tab.sync_error
+        return _BG_STATES[broken << 2 | bool(tab.pending_branches) << 1 | bool(tab.polling)]
 
     def _red_reason(self, tab):
         """Human-readable reason a tab is red (in priority order)."""
@@ -65,13 +82,37 @@ class AppTabsMixin:
     def update_tab_color(self, tab):
         """Update tab button color from `tab.polling` / health / errors.
 
+        A sync flips several of these states in a row: requests are
+        collected and applied in one after_idle pass (_flush_tab_colors),
+        so a burst costs a single redraw per tab and one title update.
+        Main thread only.
+        """
+        self._pending_color_tabs.add(tab)
+        if not self._color_flush_scheduled:
+            self._color_flush_scheduled = True
+            self.after_idle(self._flush_tab_colors)
+
+    def _flush_tab_colors(self):
+        """Apply the pending tab color updates, then refresh the title
+        once if any button changed."""
+        self._color_flush_scheduled = False
+        tabs, self._pending_color_tabs = self._pending_color_tabs, set()
+        changed = False
+        for tab in tabs:
+            changed |= self._apply_tab_color(tab)
+        if changed:
+            self.update_title()
+
+    def _apply_tab_color(self, tab):
+        """Recolor tab's button; returns whether anything changed.
+
         Short-circuits if the computed (bg_state, indicator) hasn't
         changed since the last call — this makes it cheap enough to be
         invoked by the periodic reconciler without causing flicker.
         """
         tab_name = tab.tab_name
         if tab_name not in self.tab_buttons:
-            return
+            return False
 
         btn = self.tab_buttons[tab_name]
         bg_state = self.get_tab_bg_state(tab)
@@ -94,23 +135,13 @@ class AppTabsMixin:
         cached = getattr(tab, "_last_color_state", None)
         new_state = (bg_state, indicator)
         if cached == new_state:
-            return
+            return False
         tab._last_color_state = new_state
 
-        # Define colors
-        if bg_state == "green":
-            fg_color = "#2d5a2d"
-            hover_color = "#3d7a3d"
-        elif bg_state == "red":
-            fg_color = "#8b2020"
-            hover_color = "#ab3030"
-        else:
-            fg_color = "#3d3d3d"
-            hover_color = "#4a4a4a"
-
+        fg_color, hover_color = _BG_COLORS[bg_state]
         btn.configure(fg_color=fg_color, hover_color=hover_color)
         btn.set_indicator(indicator)
-        self.update_title()
+        return True
 
     def _reconcile_tab_colors(self):
         """Periodic safety net: re-derive every tab button color from
@@ -144,7 +175,7 @@ class AppTabsMixin:
             for tab in self.tabs.values():
                 # Skip repos that already have a sync/retry in flight.
                 if self._tab_in_error(tab) and not tab.lock.locked():
-                    threading.Thread(target=tab.retry_recovery, daemon=True).start()
+                    self.pool.submit(tab.retry_recovery)
         interval = max(5, int(settings.get("auto_retry_interval_seconds", 60)))
         self.after(interval * 1000, self._retry_errored_repos)
 
@@ -164,7 +195,7 @@ class AppTabsMixin:
                 if (tab.git_healthy and not tab.polling
                         and not getattr(tab, "sync_error", False)
                         and not tab.lock.locked()):
-                    threading.Thread(target=tab.watch_for_changes, daemon=True).start()
+                    self.pool.submit(tab.watch_for_changes)
             delay = max(5, interval) * 1000
         else:
             delay = 5000  # keep polling the setting so it can be turned on live
@@ -213,12 +244,16 @@ class AppTabsMixin:
         """Add a repository tab."""
         repo_name = Path(repo_path).name
 
-        # Handle duplicate names
-        tab_name = repo_name
-        counter = 1
+        # Handle duplicate names: the nth open tab of a folder name gets
+        # " (n)". Only if a lower-numbered one was closed since can that
+        # name be taken, then the next free number is used.
+        counter = self._name_counts[repo_name]
+        tab_name = repo_name if counter == 0 else f"{repo_name} ({counter + 1})"
         while tab_name in self.tabs:
             counter += 1
-            tab_name = f"{repo_name} ({counter})"
+            tab_name = f"{repo_name} ({counter + 1})"
+        self._name_counts[repo_name] += 1
+        self._tab_name_base[tab_name] = repo_name
 
         # Get display name (alias or folder name)
         display_name = self.get_tab_display_name(repo_path)
@@ -231,7 +266,8 @@ class AppTabsMixin:
             hover_color="#4a4a4a",
             corner_radius=8,
             height=32,
-            command=lambda n=tab_name: self.on_tab_click(n)
+            font_zoom=self.global_settings.get("font_zoom", 1.0),
+            command=partial(self.on_tab_click, tab_name)
         )
         btn.pack(side="left", padx=(0, 8), pady=8)
         # Double-click for sync now (advanced mode)
@@ -251,12 +287,12 @@ class AppTabsMixin:
         self.tab_frames[tab_name] = tab_content
 
         self.tabs[tab_name] = tab_content
-        self.tab_paths[tab_name] = repo_path
+        self._set_tab_path(tab_name, repo_path)
 
         # Switch to new tab if requested
         if switch_to:
             self.switch_tab(tab_name)
-        self.after(100, self.update_title)
+        self.after_idle(self.update_title)
 
         # Auto-start polling if enabled AND restore_polling disabled
         if self.global_settings.get("auto_start_polling", False) and not self.global_settings.get("restore_polling", False):
@@ -320,12 +356,13 @@ class AppTabsMixin:
 
         # Mark as read
         tab = self.tabs[tab_name]
+        tab.note_activity()
         if tab.has_update:
             tab.has_update = False
             self.update_tab_color(tab)
 
         # Update Repository menu for new tab
-        self.update_repo_menu()
+        self.schedule_repo_menu_update()
 
     def close_tab(self, tab_name):
         """Close a repository tab."""
@@ -337,7 +374,7 @@ class AppTabsMixin:
                 tab.stop_event.set()
             tab.stop_countdown()
             # Wait for thread (max 5s)
-            tab.wait_for_polling_thread(timeout=5)
+            tab.wait_for_polling_sync(timeout=5)
 
             # Remove button
             if tab_name in self.tab_buttons:
@@ -351,7 +388,7 @@ class AppTabsMixin:
             # Destroy tab content widget
             tab.destroy()
             del self.tabs[tab_name]
-            del self.tab_paths[tab_name]
+            self._forget_tab_path(tab_name)
 
             # Switch to another tab if needed
             if self.current_tab == tab_name:
@@ -407,11 +444,11 @@ class AppTabsMixin:
         menu.add_separator()
         menu.add_command(
             label="Hide tab",
-            command=lambda: self.hide_repo(tab_name)
+            command=partial(self.hide_repo, tab_name)
         )
         menu.add_command(
             label="Close",
-            command=lambda: self.close_tab(tab_name)
+            command=partial(self.close_tab, tab_name)
         )
         menu.tk_popup(event.x_root, event.y_root)
 
@@ -430,14 +467,14 @@ class AppTabsMixin:
             tab.polling = False
             tab.stop_event.set()
         tab.stop_countdown()
-        tab.wait_for_polling_thread(timeout=2)
+        tab.wait_for_polling_sync(timeout=2)
 
         # Add to hidden repos list
         hidden = self.global_settings.get("hidden_repos", [])
         if repo_path not in hidden:
             hidden.append(repo_path)
             self.global_settings["hidden_repos"] = hidden
-            save_global_settings(self.global_settings)
+            self._mark_settings_dirty()
 
         # Remove button
         if tab_name in self.tab_buttons:
@@ -451,7 +488,7 @@ class AppTabsMixin:
         # Destroy tab content widget
         tab.destroy()
         del self.tabs[tab_name]
-        del self.tab_paths[tab_name]
+        self._forget_tab_path(tab_name)
 
         # Switch to another tab if needed
         if self.current_tab == tab_name:
@@ -461,7 +498,7 @@ class AppTabsMixin:
                 self.switch_tab(first_tab)
 
         # Update menu (for inactive repos count)
-        self.update_repo_menu()
+        self.schedule_repo_menu_update()
         self.update_title()
 
     def show_repo(self, repo_path):
@@ -471,13 +508,13 @@ class AppTabsMixin:
         if repo_path in hidden:
             hidden.remove(repo_path)
             self.global_settings["hidden_repos"] = hidden
-            save_global_settings(self.global_settings)
+            self._mark_settings_dirty()
 
         # Add repo tab
         self.add_repo(repo_path, switch_to=True)
 
         # Update menu
-        self.update_repo_menu()
+        self.schedule_repo_menu_update()
 
     def set_tab_alias(self, tab_name, alias):
         """Set or clear tab alias."""
@@ -496,7 +533,8 @@ class AppTabsMixin:
                 del aliases[repo_path]
 
         self.global_settings["tab_aliases"] = aliases
-        save_global_settings(self.global_settings)
+        self._display_names.clear()
+        self._mark_settings_dirty()
 
         # Update button text
         if tab_name in self.tab_buttons:
@@ -509,9 +547,17 @@ class AppTabsMixin:
             tab.refresh_tab_name_label()
 
     def get_tab_display_name(self, repo_path):
-        """Get display name for a repo (alias or folder name)."""
-        aliases = self.global_settings.get("tab_aliases", {})
-        return aliases.get(repo_path, Path(repo_path).name)
+        """Get display name for a repo (alias or folder name).
+
+        Asked for every tab by the menus, the recent-sync list and the
+        status markers; memoized until an alias changes or a repo moves.
+        """
+        name = self._display_names.get(repo_path)
+        if name is None:
+            aliases = self.global_settings.get("tab_aliases", {})
+            name = aliases.get(repo_path) or Path(repo_path).name
+            self._display_names[repo_path] = name
+        return name
 
     # ------------------------------------------------------------------
     # Drag-and-drop tab reordering
@@ -579,25 +625,42 @@ class AppTabsMixin:
             for n in new_order:
                 self.tab_buttons[n].pack(side="left", padx=(0, 8), pady=8)
 
+    def _set_tab_path(self, tab_name, repo_path):
+        """Record tab_name's repo path, in tab_paths and in the reverse
+        (normalized path -> tab name) map used for lookups by path."""
+        old = self.tab_paths.get(tab_name)
+        if old is not None:
+            self._path_to_tab.pop(_norm_repo_path(old), None)
+        self.tab_paths[tab_name] = repo_path
+        self._path_to_tab[_norm_repo_path(repo_path)] = tab_name
+
+    def _forget_tab_path(self, tab_name):
+        """Drop a closed tab from tab_paths, the reverse map and the
+        duplicate-name counts."""
+        repo_path = self.tab_paths.pop(tab_name, None)
+        if repo_path is not None:
+            self._path_to_tab.pop(_norm_repo_path(repo_path), None)
+        base = self._tab_name_base.pop(tab_name, None)
+        if base is not None:
+            self._name_counts[base] -= 1
+            if self._name_counts[base] <= 0:
+                del self._name_counts[base]
+
     def find_known_repo(self, path):
         """Return (existing_raw_path, kind) if `path` matches an
         already-known repo, else None. `kind` is 'open' or 'hidden'.
 
         Comparison resolves symlinks and strips trailing slashes so the
         same repo addressed via different path forms is still caught.
+        Open tabs are found in the reverse map, without resolving every
+        open path again.
         """
-        def norm(p):
-            try:
-                return str(Path(p).resolve())
-            except Exception:
-                return str(p).rstrip("/\\")
-
-        target = norm(path)
-        for raw in self.tab_paths.values():
-            if norm(raw) == target:
-                return raw, "open"
+        target = _norm_repo_path(path)
+        tab_name = self._path_to_tab.get(target)
+        if tab_name is not None:
+            return self.tab_paths[tab_name], "open"
         for raw in self.global_settings.get("hidden_repos", []):
-            if norm(raw) == target:
+            if _norm_repo_path(raw) == target:
                 return raw, "hidden"
         return None
 
@@ -626,19 +689,26 @@ class AppTabsMixin:
                 parent=self,
             )
             return False
-        if new_path in self.tab_paths.values():
+        if self._path_to_tab.get(_norm_repo_path(new_path), tab_name) != tab_name:
             messagebox.showinfo(
                 "Info", "This repository is already open in another tab.",
                 parent=self,
             )
             return False
 
-        # Update the live tab instance (sync/polling read these directly)
+        # Update the live tab instance (sync/polling read these directly);
+        # the new path's git env and ref watch come with its next health check
+        self.ref_watcher.unwatch(tab)
+        unregister_repo_env(tab.repo_path)
         tab.repo_path = Path(new_path)
+        tab.config_file = tab.repo_path / "githerd.toml"
+        tab._cfg_mtime = 0  # force the polling loop to re-read it
         tab.base_tab_name = Path(new_path).name
+        tab.gsess.close()
+        tab.gsess = GitSession(tab.repo_path, tab.git, store=self.state_cache)
 
         # Update App bookkeeping
-        self.tab_paths[tab_name] = new_path
+        self._set_tab_path(tab_name, new_path)
 
         # Migrate path-keyed settings
         s = self.global_settings
@@ -646,6 +716,7 @@ class AppTabsMixin:
             d = s.get(key)
             if isinstance(d, dict) and old_path in d:
                 d[new_path] = d.pop(old_path)
+        self._display_names.clear()
         hidden = s.get("hidden_repos", [])
         if old_path in hidden:
             hidden[hidden.index(old_path)] = new_path
@@ -5,14 +5,24 @@ GitHerd — Configuration and persistence module.
 Handles global settings, repository configuration, and persistence.
 """
 
+import hashlib
 import json
+import os
+import tempfile
+import threading
 from pathlib import Path
+from types import MappingProxyType
 
 try:
     import tomllib
 except ModuleNotFoundError:
     import tomli as tomllib
 
+try:
+    import orjson  # optional: faster JSON parsing and serialization
+except ImportError:
+    orjson = None
+
 # ============================================================
 # PATHS
 # ============================================================
@@ -20,6 +30,9 @@ except ModuleNotFoundError:
 CONFIG_DIR = Path.home() / ".config" / "githerd"
 REPOS_FILE = CONFIG_DIR / "repos.json"
 SETTINGS_FILE = CONFIG_DIR / "settings.json"
+# Recomputable data (last-known branch state) goes under XDG_CACHE_HOME
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "githerd"
+STATE_CACHE_FILE = CACHE_DIR / "state.sqlite3"
 
 # ============================================================
 # DEFAULT SETTINGS
@@ -46,43 +59,128 @@ DEFAULT_GLOBAL_SETTINGS = {
     "auto_retry_errored": False,  # Periodically try to recover repos that are in an error state
     "auto_retry_interval_seconds": 60,  # How often (seconds) to attempt recovery of errored repos
     "watch_idle_interval_seconds": 0,  # Watch non-polling repos and auto-start polling on change (0 = off)
-    "inactivity_disable_hours": 24  # Auto-disable polling after this many hours without activity (0 = off)
+    "idle_backoff_max_seconds": 900,  # Stretch the polling interval of repos with nothing to do, up to this (0 = off)
+    "inactivity_disable_hours": 24,  # Auto-disable polling after this many hours without activity (0 = off)
+    "max_log_lines": 2000  # Lines kept in each tab's log; older ones are dropped (0 = unlimited)
 }
 
 APPEARANCE_MODES = ["dark", "light", "system"]
 COLOR_THEMES = ["blue", "dark-blue", "green"]
 
-DEFAULT_REPO_CONFIG = {
+# Read-only: shared by every thread; callers take a .copy() to edit
+DEFAULT_REPO_CONFIG = MappingProxyType({
     "remote": "origin",
     "main_branch": "main",
     "branch_prefix": "claude/",
-    "interval_seconds": 60
-}
+    "interval_seconds": 60,
+    "refresh_if_hidden": True  # False: poll 10x less often while the tab isn't shown
+})
+
+# githerd.toml table holding each repo config key: loading and saving
+# both walk this, so a new key is one line here plus its default above
+_REPO_CONFIG_SECTIONS = MappingProxyType({
+    "remote": "git",
+    "main_branch": "git",
+    "branch_prefix": "git",
+    "interval_seconds": "sync",
+    "refresh_if_hidden": "ui"
+})
+
+# ============================================================
+# FILE HELPERS
+# ============================================================
+
+
+def _json_loads(data):
+    """Parse JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj, indent=False):
+    """Serialize obj to JSON bytes (2-space indented if indent), with
+    orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass  # e.g. a non-str key, which json coerces
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+# Serializes _atomic_write: settings are saved from sync workers as well
+# as from the Tk thread
+_write_lock = threading.Lock()
+
+
+def _atomic_write(path, data):
+    """Write bytes to path through a temp file + os.replace, so a crash
+    mid-write never leaves a truncated file behind. Each write gets its
+    own temp file, and writers take turns."""
+    with _write_lock:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
 
 # ============================================================
 # GLOBAL SETTINGS
 # ============================================================
 
 
+# Default values that are containers (polling_states, hidden_repos…)
+_DEFAULT_CONTAINER_KEYS = tuple(
+    k for k, v in DEFAULT_GLOBAL_SETTINGS.items() if isinstance(v, (dict, list))
+)
+
+
+def _fresh_defaults():
+    """DEFAULT_GLOBAL_SETTINGS with new empty containers: callers fill
+    e.g. settings["hidden_repos"] in place, which must not edit the
+    module-level defaults when the key wasn't in the file."""
+    settings = DEFAULT_GLOBAL_SETTINGS.copy()
+    for key in _DEFAULT_CONTAINER_KEYS:
+        settings[key] = settings[key].copy()
+    return settings
+
+
 def load_global_settings():
-    """Load global settings from file."""
-    if SETTINGS_FILE.exists():
-        try:
-            with open(SETTINGS_FILE, "r") as f:
-                data = json.load(f)
-                settings = DEFAULT_GLOBAL_SETTINGS.copy()
-                settings.update(data)
-                return settings
-        except Exception:
-            pass
-    return DEFAULT_GLOBAL_SETTINGS.copy()
+    """Load global settings from file.
+
+    Parsed on every call: with _json_loads (orjson when installed) that
+    is cheaper than caching the parsed dict and deep-copying it for each
+    caller. Callers get their own dict, free to edit.
+    """
+    try:
+        with open(SETTINGS_FILE, "rb") as f:
+            data = _json_loads(f.read())
+        settings = _fresh_defaults()
+        settings.update(data)
+        return settings
+    except Exception:
+        pass
+    return _fresh_defaults()
 
 
 def save_global_settings(settings):
-    """Save global settings to file."""
+    """Save global settings to file (atomically, like save_repos)."""
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    with open(SETTINGS_FILE, "w") as f:
-        json.dump(settings, f, indent=2)
+    # Serialized up front and swapped in whole: a crash mid-save can't
+    # leave a truncated file that would load as all-defaults
+    _atomic_write(SETTINGS_FILE, _json_dumps(settings, indent=True))
 
 
 # ============================================================
@@ -90,36 +188,72 @@ def save_global_settings(settings):
 # ============================================================
 
 
+# str(githerd.toml path) -> ((mtime_ns, size), resolved config) of the last read
+_repo_config_cache = {}
+
+
 def load_repo_config(repo_path):
-    """Load repo config from githerd.toml, or use defaults."""
+    """Load repo config from githerd.toml, or use defaults.
+
+    Like settings.json, the file is only parsed again when its mtime or
+    size changed (tabs re-created by a UI rebuild read it again).
+    """
     config_file = Path(repo_path) / "githerd.toml"
-    if config_file.exists():
-        try:
-            cfg = tomllib.load(open(config_file, "rb"))
-            return {
-                "remote": cfg.get("git", {}).get("remote", DEFAULT_REPO_CONFIG["remote"]),
-                "main_branch": cfg.get("git", {}).get("main_branch", DEFAULT_REPO_CONFIG["main_branch"]),
-                "branch_prefix": cfg.get("git", {}).get("branch_prefix", DEFAULT_REPO_CONFIG["branch_prefix"]),
-                "interval_seconds": cfg.get("sync", {}).get("interval_seconds", DEFAULT_REPO_CONFIG["interval_seconds"])
-            }
-        except Exception:
-            pass
-    return DEFAULT_REPO_CONFIG.copy()
+    path = str(config_file)
+    try:
+        # No exists() pre-check: a missing file is just the first except
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        cached = _repo_config_cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1].copy()
+        with open(path, "rb") as f:
+            cfg = tomllib.load(f)
+    except Exception:
+        return DEFAULT_REPO_CONFIG.copy()
+    config = DEFAULT_REPO_CONFIG.copy()
+    for name, section in _REPO_CONFIG_SECTIONS.items():
+        table = cfg.get(section)
+        if isinstance(table, dict) and name in table:
+            config[name] = table[name]
+    _repo_config_cache[path] = (key, config)
+    return config.copy()
+
+
+# Escapes for a TOML basic string: backslash, quote, and every control
+# character (short form where TOML has one, \uXXXX otherwise)
+_TOML_ESCAPES = {c: f"\\u{c:04X}" for c in (*range(0x20), 0x7F)}
+_TOML_ESCAPES.update({
+    ord("\\"): "\\\\", ord('"'): '\\"', ord("\b"): "\\b", ord("\t"): "\\t",
+    ord("\n"): "\\n", ord("\f"): "\\f", ord("\r"): "\\r",
+})
+
+
+def _toml_value(value):
+    """TOML literal for a repo config value."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    # Basic string: a quote, backslash or newline in a branch prefix
+    # must not break the file
+    return f'"{str(value).translate(_TOML_ESCAPES)}"'
 
 
 def save_repo_config(repo_path, config):
     """Save repo config to githerd.toml."""
     config_file = Path(repo_path) / "githerd.toml"
-    toml_content = f'''[git]
-remote = "{config['remote']}"
-main_branch = "{config['main_branch']}"
-branch_prefix = "{config['branch_prefix']}"
-
-[sync]
-interval_seconds = {config['interval_seconds']}
-'''
-    with open(config_file, "w") as f:
-        f.write(toml_content)
+    sections = {}
+    for key, section in _REPO_CONFIG_SECTIONS.items():
+        value = config.get(key, DEFAULT_REPO_CONFIG[key])
+        sections.setdefault(section, []).append(f"{key} = {_toml_value(value)}")
+    toml_content = "\n".join(
+        f"[{section}]\n" + "\n".join(lines) + "\n" for section, lines in sections.items()
+    )
+    _repo_config_cache.pop(str(config_file), None)
+    # Binary: one write, "\n" line endings on every platform
+    with open(config_file, "wb") as f:
+        f.write(toml_content.encode("utf-8"))
 
 
 # ============================================================
@@ -127,12 +261,15 @@ interval_seconds = {config['interval_seconds']}
 # ============================================================
 
 
+_last_repos_digest = None  # digest of the repos.json bytes last written
+
+
 def load_saved_repos():
     """Load list of saved repositories."""
     if REPOS_FILE.exists():
         try:
-            with open(REPOS_FILE, "r") as f:
-                data = json.load(f)
+            with open(REPOS_FILE, "rb") as f:
+                data = _json_loads(f.read())
                 return data.get("repos", [])
         except Exception:
             pass
@@ -140,10 +277,20 @@ def load_saved_repos():
 
 
 def save_repos(repos):
-    """Save list of repositories."""
+    """Save list of repositories.
+
+    The write is skipped entirely when the serialized content is the
+    same as what was last written; otherwise the file is replaced
+    atomically.
+    """
+    global _last_repos_digest
+    data = _json_dumps({"repos": repos})
+    digest = hashlib.sha1(data).digest()
+    if digest == _last_repos_digest and REPOS_FILE.exists():
+        return
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    with open(REPOS_FILE, "w") as f:
-        json.dump({"repos": repos}, f, indent=2)
+    _atomic_write(REPOS_FILE, data)
+    _last_repos_digest = digest
 
 
 # ============================================================
@@ -5,28 +5,167 @@ GitHerd — Git utility functions.
 Low-level Git operations and helpers.
 """
 
+import os
 import subprocess
+import threading
+import time
+
+try:
+    import pygit2  # optional: in-process reads, see GitSession
+except ImportError:
+    pygit2 = None
 
 from .config import DEFAULT_REPO_CONFIG
 
 
-def run_git(cmd, cwd=None, timeout=30):
-    """Run a git command and return (returncode, stdout, stderr).
+# Cap on git processes run through run_git at once, across all tabs, so
+# a burst (many repos polling, startup scans) doesn't fork dozens of
+# gits at the same time. Not below 4: a fetch stuck on a slow remote
+# holds its slot, and local lookups should still get through.
+_GIT_SLOTS = threading.BoundedSemaphore(max(4, os.cpu_count() or 4))
+
+# Short-lived cache of read-only git commands, keyed on (cmd, cwd). One
+# poll tick asks the same questions from several places (health check,
+# branch scan, menus, dialogs); within READ_CACHE_TTL seconds they get
+# the first answer. Any other command run in that cwd (fetch, push,
+# merge, pull, reset…) drops its entries first, so our own writes are
+# never masked. Only successful results are kept.
+READ_CACHE_TTL = 2.0
+_READ_ONLY_CMDS = frozenset({
+    "rev-list", "for-each-ref", "diff", "diff-tree", "log", "rev-parse",
+    "show-ref", "symbolic-ref", "merge-base",
+})
+_read_cache = {}  # (tuple(cmd), cwd, always_stderr) -> (monotonic time, result)
+_read_cache_lock = threading.Lock()
+
+
+def invalidate_read_cache(cwd=None):
+    """Drop cached read results for cwd (all repos if None)."""
+    with _read_cache_lock:
+        if cwd is None:
+            _read_cache.clear()
+            return
+        cwd = str(cwd)
+        for key in [k for k in _read_cache if k[1] == cwd]:
+            del _read_cache[key]
+
+
+# Per-repository environment, keyed by str(cwd). With GIT_DIR and
+# GIT_WORK_TREE set, git skips walking up from cwd to discover the
+# repository on every call; GIT_OPTIONAL_LOCKS=0 keeps our read-only
+# queries from taking index.lock (and racing the user's editor or IDE).
+_REPO_ENV = {}
+
+
+def register_repo_env(cwd, git="git"):
+    """Resolve the repository at cwd once and reuse it for later calls.
+
+    No-op if cwd is already registered or isn't a repository (calls then
+    just run with the inherited environment).
+    """
+    key = str(cwd)
+    if key in _REPO_ENV:
+        return
+    # --show-toplevel fails in a bare repo, after printing the rest
+    _, out, _ = run_git_raw(
+        [git, "rev-parse", "--is-bare-repository", "--absolute-git-dir",
+         "--show-toplevel"],
+        cwd=cwd
+    )
+    lines = out.decode(errors="replace").splitlines()
+    if len(lines) < 2:
+        return
+    env = dict(os.environ, GIT_DIR=lines[1], GIT_OPTIONAL_LOCKS="0")
+    if lines[0] != "true":
+        if len(lines) < 3:
+            return
+        env["GIT_WORK_TREE"] = lines[2]
+    _REPO_ENV[key] = env
+
+
+def unregister_repo_env(cwd):
+    """Forget the environment of cwd (repo moved, tab closed)."""
+    _REPO_ENV.pop(str(cwd), None)
+
+
+def repo_env(cwd):
+    """Environment for git calls run in cwd (None: inherit ours)."""
+    return _REPO_ENV.get(str(cwd)) if cwd is not None else None
+
+
+def git_common_dir(cwd):
+    """Shared git dir of the repository at cwd (the main repo's .git for
+    a linked worktree), or None if cwd isn't registered.
+
+    Read from GIT_DIR/commondir the way git itself resolves it, without
+    spawning git.
+    """
+    env = repo_env(cwd)
+    if env is None:
+        return None
+    git_dir = env["GIT_DIR"]
+    try:
+        with open(os.path.join(git_dir, "commondir"), encoding="utf-8") as f:
+            common = f.read().strip()
+    except OSError:
+        return git_dir
+    return os.path.normpath(os.path.join(git_dir, common))
+
+
+def run_git_raw(cmd, cwd=None, timeout=30, always_stderr=False):
+    """Run a git command and return (returncode, stdout bytes, stderr).
+
+    Read-only commands are answered from the read cache for
+    READ_CACHE_TTL seconds (see _read_cache); anything else invalidates
+    the cwd's entries before and after it runs (a read racing it must
+    not outlive it).
+
+    Output is read as bytes and stderr is only decoded when the command
+    failed (or always_stderr is set): for the hot read-only calls
+    (counts, ref lookups) nothing is decoded at all and the caller
+    parses the few bytes it needs.
 
     On timeout, the partial stderr captured before the kill is included
     in the returned stderr string so the caller can show the actual
     network/auth failure git was reporting.
     """
+    if len(cmd) < 2 or cmd[1] not in _READ_ONLY_CMDS:
+        if cwd is None:
+            return _exec_git(cmd, cwd, timeout, always_stderr)
+        invalidate_read_cache(cwd)
+        try:
+            return _exec_git(cmd, cwd, timeout, always_stderr)
+        finally:
+            invalidate_read_cache(cwd)
+    key = (tuple(cmd), str(cwd), always_stderr)
+    hit = _read_cache.get(key)
+    if hit is not None and time.monotonic() - hit[0] < READ_CACHE_TTL:
+        return hit[1]
+    result = _exec_git(cmd, cwd, timeout, always_stderr)
+    if result[0] == 0:
+        with _read_cache_lock:
+            if len(_read_cache) >= 512:
+                _read_cache.clear()
+            _read_cache[key] = (time.monotonic(), result)
+    return result
+
+
+def _exec_git(cmd, cwd, timeout, always_stderr):
+    """run_git_raw() without the read cache."""
     try:
-        p = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd=cwd,
-            timeout=timeout
-        )
-        return p.returncode, p.stdout.strip(), p.stderr.strip()
+        with _GIT_SLOTS:
+            p = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cwd,
+                env=repo_env(cwd),
+                timeout=timeout
+            )
+        err = ""
+        if p.returncode or always_stderr:
+            err = p.stderr.decode(errors="replace").strip()
+        return p.returncode, p.stdout, err
     except subprocess.TimeoutExpired as e:
         partial = ""
         if e.stderr:
@@ -38,98 +177,773 @@ def run_git(cmd, cwd=None, timeout=30):
         msg = f"Timeout after {timeout}s"
         if partial:
             msg += f" — last stderr: {partial}"
-        return 1, "", msg
+        return 1, b"", msg
     except FileNotFoundError:
-        return 1, "", f"Command not found: {cmd[0]}"
+        return 1, b"", f"Command not found: {cmd[0]}"
     except Exception as e:
-        return 1, "", str(e)
+        return 1, b"", str(e)
+
+
+def run_git(cmd, cwd=None, timeout=30):
+    """Run a git command and return (returncode, stdout, stderr).
+
+    Both streams decoded: git prints progress and push/fetch summaries
+    on stderr even when it succeeds.
+    """
+    code, out, err = run_git_raw(cmd, cwd=cwd, timeout=timeout,
+                                 always_stderr=True)
+    return code, out.decode(errors="replace").strip(), err
+
+
+def run_git_stream(cmd, on_line, cwd=None, timeout=30):
+    """Run a (writing) git command, handing each output line to
+    on_line as git prints it. Returns (returncode, last line).
+
+    stdout and stderr are merged, in the order git wrote them, and
+    nothing is accumulated: a pull or push with a long summary reaches
+    the log a line at a time instead of as one blob once git exits.
+    The last non-empty line (usually git's "fatal: …") is returned for
+    error reporting; on timeout git is killed and that message says so.
+    """
+    if cwd is not None:
+        invalidate_read_cache(cwd)
+    last = ""
+    try:
+        with _GIT_SLOTS:
+            p = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                cwd=cwd,
+                env=repo_env(cwd),
+                close_fds=True
+            )
+            timed_out = threading.Event()
+
+            def kill():
+                timed_out.set()
+                p.kill()
+
+            timer = threading.Timer(timeout, kill)
+            timer.daemon = True
+            timer.start()
+            try:
+                with p.stdout:
+                    for raw in p.stdout:
+                        line = raw.decode(errors="replace").rstrip()
+                        if line:
+                            last = line
+                            on_line(line)
+                code = p.wait()
+            finally:
+                timer.cancel()
+        if timed_out.is_set():
+            msg = f"Timeout after {timeout}s"
+            if last:
+                msg += f" — last output: {last}"
+            return 1, msg
+        return code, last
+    except FileNotFoundError:
+        return 1, f"Command not found: {cmd[0]}"
+    except Exception as e:
+        return 1, str(e)
+    finally:
+        if cwd is not None:
+            invalidate_read_cache(cwd)
+
+
+class GitSession:
+    """Long-lived git helper process for one repository.
+
+    Ref lookups are written down the stdin of a single
+    `git cat-file --batch-check` instead of forking a `git rev-parse`
+    (and re-opening the repository) for every query. The process is
+    spawned lazily, respawned if it dies, and reaped by close().
+
+    Counting queries can't share the trick: `rev-list --stdin` reads
+    all of its input before printing one aggregate count, so those
+    stay one-shot processes. File lists of branches that are not behind
+    base (base is then their fork point) go through a second persistent
+    `git diff-tree --stdin`; diverged branches need a merge-base first
+    and use a one-shot diff.
+
+    When pygit2 is installed and the stock `git` binary is configured,
+    all read-only queries (refs, ahead/behind, changed files) are
+    answered in-process through libgit2 instead; fetch/push/pull/merge
+    always go through the git binary (credentials, hooks).
+
+    With a store (a state_cache.StateCache), counts and file lists that
+    miss the in-memory caches are looked up there before asking git,
+    and whatever git answers is written back: branches that didn't move
+    since the last run cost nothing at startup.
+
+    Thread-safe: one query at a time goes through the pipe (or the
+    libgit2 repository, which must not be shared across threads).
+    """
+
+    _CACHE_MAX = 512  # memoized results kept per cache
+
+    def __init__(self, cwd, git="git", store=None):
+        self.cwd = cwd
+        self.git = git
+        self.store = store
+        self._lock = threading.Lock()
+        self._catfile = None
+        self._difftree = None
+        self._difftree_lock = threading.Lock()
+        self._closed = False
+        self._count_cache = {}  # (base oid, tip oid) -> (ahead, behind)
+        self._diff_cache = {}  # (base oid, tip oid) -> frozenset of path hashes
+        self._repo = None
+        if pygit2 is not None and git == "git":
+            try:
+                self._repo = pygit2.Repository(str(cwd))
+            except Exception:
+                self._repo = None
+
+    @property
+    def in_process(self):
+        """True when queries are answered by libgit2 (pygit2)."""
+        return self._repo is not None
+
+    def _oid(self, rev):
+        """libgit2 lookup: object id of rev as a pygit2.Oid, or None.
+        Caller holds _lock and has checked _repo (close() clears it)."""
+        try:
+            return self._repo.revparse_single(rev).id
+        except (KeyError, ValueError, pygit2.GitError):
+            return None
+
+    def _catfile_proc(self):
+        """Return the running cat-file process, spawning it if needed."""
+        if self._closed:
+            raise OSError("session closed")
+        if self._catfile is None or self._catfile.poll() is not None:
+            self._catfile = subprocess.Popen(
+                [self.git, "cat-file", "--batch-check=%(objectname) %(objecttype)"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.cwd,
+                env=repo_env(self.cwd)
+            )
+        return self._catfile
+
+    def resolve(self, rev):
+        """Return the object id rev points to, or None if it doesn't exist."""
+        if "\n" in rev:
+            return None
+        with self._lock:
+            if self._repo is not None:
+                oid = self._oid(rev)
+                return str(oid) if oid is not None else None
+            try:
+                p = self._catfile_proc()
+                p.stdin.write(rev.encode() + b"\n")
+                p.stdin.flush()
+                line = p.stdout.readline().decode()
+            except (OSError, ValueError):
+                # Pipe broke, git vanished or the session was closed under
+                # a late worker: answer this one query the slow way.
+                self._close_catfile()
+                code, out, _ = run_git(
+                    [self.git, "rev-parse", "--verify", "--quiet", rev],
+                    cwd=self.cwd
+                )
+                return out if code == 0 and out else None
+        parts = line.split()
+        if len(parts) != 2 or parts[1] in ("missing", "ambiguous"):
+            return None
+        return parts[0]
+
+    def _remember(self, cache, key, value):
+        """Store a memoized result, starting over once the cache is full
+        (entries for tips that have since moved are never hit again)."""
+        if len(cache) >= self._CACHE_MAX:
+            cache.clear()
+        cache[key] = value
+        return value
+
+    def ahead_behind(self, base, tip):
+        """Return (ahead, behind) of tip relative to base.
+
+        Memoized on the (base, tip) object ids: while neither side
+        moves, the count is answered without walking history again.
+        """
+        base_oid, tip_oid = self.resolve(base), self.resolve(tip)
+        if base_oid is None or tip_oid is None:
+            raise RuntimeError(f"unknown revision: {base if base_oid is None else tip}")
+        return self.ahead_behind_oids(base_oid, tip_oid)
+
+    def prime_counts(self, base_oid, tip_oid, counts):
+        """Record an (ahead, behind) pair computed elsewhere."""
+        key = (base_oid, tip_oid)
+        if self._count_cache.get(key) != counts:
+            self._remember(self._count_cache, key, counts)
+            if self.store is not None:
+                self.store.put_counts(str(self.cwd), base_oid, tip_oid, counts)
+
+    def _stored_counts(self, key, compute):
+        """Counts for key from the store, else compute() (saved there)."""
+        if self.store is None:
+            return compute()
+        counts = self.store.get_counts(str(self.cwd), *key)
+        if counts is None:
+            counts = tuple(compute())
+            self.store.put_counts(str(self.cwd), *key, counts)
+        return counts
+
+    def ahead_behind_oids(self, base_oid, tip_oid):
+        """ahead_behind() for object ids the caller already has (e.g. from
+        for-each-ref), skipping the two lookups."""
+        key = (base_oid, tip_oid)
+        hit = self._count_cache.get(key)
+        if hit is not None:
+            return hit
+        def compute():
+            # _repo is checked again under the lock: close() (tab closed
+            # or relocated) may have freed it since in_process was read
+            with self._lock:
+                repo = self._repo
+                if repo is not None:
+                    return repo.ahead_behind(tip_oid, base_oid)
+            return commits_ahead_behind(base_oid, tip_oid, cwd=self.cwd, git=self.git)
+        counts = self._stored_counts(key, compute)
+        return self._remember(self._count_cache, key, counts)
+
+    def is_ahead(self, base, tip):
+        """True if tip has at least one commit base doesn't.
+
+        For callers that only need presence, not the number: a cached
+        count answers directly, otherwise `rev-list --max-count=1` stops
+        at the first commit instead of walking back to the fork point.
+        """
+        key = (self.resolve(base), self.resolve(tip))
+        if None in key:
+            raise RuntimeError(f"unknown revision: {base if key[0] is None else tip}")
+        hit = self._count_cache.get(key)
+        if hit is not None:
+            return hit[0] > 0
+        if self._repo is not None:
+            return self.ahead_behind(base, tip)[0] > 0
+        return commits_ahead_nonzero(key[0], key[1], cwd=self.cwd, git=self.git)
+
+    def changed_files(self, base, tip):
+        """Set of files changed on tip since it forked from base
+        (what `git diff --name-only base...tip` lists), as path hashes.
+
+        The sets are only ever intersected, and they are kept in the
+        cache for as long as the refs don't move, so each path is
+        stored as its 64-bit hash() rather than as a bytes object: a
+        fraction of the memory for big diffs, and cheaper comparisons.
+        hash() is only stable within one process, which is all a cache
+        needs; a collision can only report an overlap that isn't there
+        (a STOP), never hide one.
+
+        Memoized on the (base, tip) object ids, like ahead_behind().
+        """
+        key = (self.resolve(base), self.resolve(tip))
+        if None in key:
+            return frozenset()
+        hit = self._diff_cache.get(key)
+        if hit is not None:
+            return hit
+        base_oid, tip_oid = key
+        if self.store is not None:
+            files = self.store.get_files(str(self.cwd), base_oid, tip_oid)
+            if files is not None:
+                return self._remember(self._diff_cache, key, frozenset(map(hash, files)))
+        files = None
+        with self._lock:
+            repo = self._repo  # None as well once close() freed it
+            if repo is not None:
+                fork = repo.merge_base(base_oid, tip_oid)
+                if fork is None:
+                    files = ()
+                else:
+                    diff = repo.diff(repo[fork], repo[tip_oid])
+                    files = [d.new_file.raw_path for d in diff.deltas]
+        if files is None:
+            counts = self._count_cache.get(key)
+            if counts is not None and counts[1] == 0:
+                files = self._tree_diff(base_oid, tip_oid)
+            if files is None:
+                files = get_changed_files(base_oid, tip_oid, cwd=self.cwd, git=self.git)
+        # An empty list is not persisted: a diff that failed looks the
+        # same, and would then be trusted forever
+        if self.store is not None and files:
+            self.store.put_files(str(self.cwd), base_oid, tip_oid, files)
+        return self._remember(self._diff_cache, key, frozenset(map(hash, files)))
+
+    def cached_changed_files(self, base, tip):
+        """changed_files(base, tip) if it is already memoized, else None.
+        Never runs a diff."""
+        key = (self.resolve(base), self.resolve(tip))
+        if None in key:
+            return frozenset()
+        return self._diff_cache.get(key)
+
+    def branches_ahead_behind(self, base, ref_prefix):
+        """In-process get_branches_with_ahead_behind(): (branch, ahead,
+        behind) for every ref under ref_prefix (e.g.
+        "refs/remotes/origin/claude/"), branch in short form.
+
+        None if the session was closed meanwhile (the caller then scans
+        with the git binary)."""
+        with self._lock:
+            if self._repo is None:
+                return None
+            base_oid = self._oid(base)
+            if base_oid is None:
+                raise RuntimeError(f"unknown revision: {base}")
+            result = []
+            for name in sorted(self._repo.listall_references()):
+                if not name.startswith(ref_prefix):
+                    continue
+                tip_oid = self._repo.references[name].resolve().target
+                key = (str(base_oid), str(tip_oid))
+                counts = self._count_cache.get(key)
+                if counts is None:
+                    counts = self._remember(
+                        self._count_cache, key,
+                        self._stored_counts(
+                            key, lambda: self._repo.ahead_behind(tip_oid, base_oid)
+                        )
+                    )
+                result.append((name[len("refs/remotes/"):], counts[0], counts[1]))
+            return result
+
+    # diff-tree --stdin passes lines that aren't commits through as-is:
+    # one after each query marks the end of its output.
+    _DIFFTREE_END = b"--githerd-end--\n"
+
+    def _tree_diff(self, base_oid, tip_oid):
+        """Paths differing between two commits, via the persistent
+        diff-tree. None if the helper isn't usable (caller falls back).
+
+        The helper answers one query at a time. When are_files_disjoint
+        fans the branches out over a pool, a query that finds it busy
+        doesn't queue behind the others: it returns None and its worker
+        runs a one-shot diff in parallel instead.
+        """
+        end = self._DIFFTREE_END
+        if not self._difftree_lock.acquire(blocking=False):
+            return None
+        try:
+            try:
+                if self._closed:
+                    return None
+                p = self._difftree
+                if p is None or p.poll() is not None:
+                    p = self._difftree = subprocess.Popen(
+                        [self.git, "diff-tree", "--stdin", "-r", "--name-only",
+                         "-z", "--no-renames", "--no-commit-id"],
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL,
+                        cwd=self.cwd,
+                        env=repo_env(self.cwd)
+                    )
+                p.stdin.write(f"{tip_oid} {base_oid}\n".encode() + end)
+                p.stdin.flush()
+                out = b""
+                while not (out == end or out.endswith(b"\0" + end)):
+                    line = p.stdout.readline()
+                    if not line:
+                        raise OSError("diff-tree exited")
+                    out += line
+            except (OSError, ValueError):
+                self._close_difftree()
+                return None
+        finally:
+            self._difftree_lock.release()
+        return out[:-len(end)].split(b"\0")[:-1]
+
+    def _close_difftree(self):
+        p, self._difftree = self._difftree, None
+        if p is None:
+            return
+        try:
+            p.stdin.close()
+            p.wait(timeout=2)
+        except Exception:
+            p.kill()
+
+    def _close_catfile(self):
+        p, self._catfile = self._catfile, None
+        if p is None:
+            return
+        try:
+            p.stdin.close()
+            p.wait(timeout=2)
+        except Exception:
+            p.kill()
+
+    def close(self):
+        """Terminate the helper processes."""
+        with self._difftree_lock:
+            self._closed = True
+            self._close_difftree()
+        with self._lock:
+            self._closed = True
+            self._close_catfile()
+            if self._repo is not None:
+                self._repo.free()
+                self._repo = None
 
 
 def commits_ahead(base, tip, cwd=None, git="git"):
     """Count commits that tip has ahead of base."""
-    code, out, err = run_git([git, "rev-list", "--count", f"{base}..{tip}"], cwd=cwd)
+    code, out, err = run_git_raw([git, "rev-list", "--count", f"{base}..{tip}"], cwd=cwd)
     if code != 0:
         raise RuntimeError(err)
     return int(out)
 
 
+def commits_ahead_nonzero(base, tip, cwd=None, git="git"):
+    """Check whether tip has any commit base doesn't (early-exit walk)."""
+    code, out, err = run_git_raw(
+        [git, "rev-list", "--max-count=1", f"{base}..{tip}"], cwd=cwd
+    )
+    if code != 0:
+        raise RuntimeError(err)
+    return bool(out.strip())
+
+
 def commits_behind(base, tip, cwd=None, git="git"):
     """Count commits that tip is behind base."""
-    code, out, err = run_git([git, "rev-list", "--count", f"{tip}..{base}"], cwd=cwd)
+    code, out, _ = run_git_raw([git, "rev-list", "--count", f"{tip}..{base}"], cwd=cwd)
     if code != 0:
         return 0
     return int(out)
 
 
-def get_tracked_branches(remote, prefix, cwd=None, git="git"):
-    """Get list of remote branches matching prefix."""
-    code, out, err = run_git(
-        [git, "for-each-ref", "--format=%(refname:short)",
-         f"refs/remotes/{remote}/{prefix}"],
+def commits_ahead_behind(base, tip, cwd=None, git="git"):
+    """Count commits tip is ahead of and behind base, in one rev-list.
+
+    `--left-right --count base...tip` prints "<behind>\t<ahead>": the
+    left column is what only base has, the right column what only tip
+    has. Returns (ahead, behind).
+    """
+    code, out, err = run_git_raw(
+        [git, "rev-list", "--left-right", "--count", f"{base}...{tip}"],
         cwd=cwd
     )
     if code != 0:
         raise RuntimeError(err)
-    return out.splitlines() if out else []
+    behind, ahead = out.split()
+    return int(ahead), int(behind)
 
 
-def get_changed_files(base, tip, cwd=None, git="git"):
-    """Get set of files changed between base and tip."""
-    code, out, err = run_git([git, "diff", "--name-only", f"{base}...{tip}"], cwd=cwd)
+# Git binaries known to reject the %(ahead-behind:) atom (git < 2.41),
+# so we don't pay for a failing for-each-ref on every scan.
+_NO_AHEAD_BEHIND_ATOM = set()
+
+
+def get_branches_with_ahead_behind(remote, main, prefix, cwd=None, git="git",
+                                   session=None, executor=None):
+    """List tracked branches with their ahead/behind counts vs main.
+
+    Returns a list of (branch, ahead, behind) tuples, branch being the
+    same "origin/claude/x" form get_tracked_branches() returns.
+
+    With git >= 2.41 the whole scan is a single for-each-ref using the
+    %(ahead-behind:) atom. Older git rejects the atom; we then list the
+    refs and run one left-right rev-list per branch (still half the
+    processes of the separate commits_ahead/commits_behind calls).
+    A pygit2-backed session does the whole scan in-process.
+
+    In the per-branch fallback, the rev-lists run concurrently on
+    executor (a concurrent.futures executor) when one is given. With a
+    session, the refs are listed along with their object ids and only
+    branches whose (main, tip) pair moved since the last scan are
+    counted again; the rest come from the session's cache.
+    """
+    base = f"{remote}/{main}"
+    if session is not None and session.in_process:
+        result = session.branches_ahead_behind(base, f"refs/remotes/{remote}/{prefix}")
+        if result is not None:
+            return result
+    if git not in _NO_AHEAD_BEHIND_ATOM:
+        code, out, err = run_git(
+            [git, "for-each-ref",
+             f"--format=%(refname:short)%09%(ahead-behind:{base})%09%(objectname)",
+             f"refs/remotes/{remote}/{prefix}"],
+            cwd=cwd
+        )
+        if code == 0:
+            # Hand the counts to the session too: changed_files() uses
+            # them to tell which branches can go through diff-tree.
+            base_oid = session.resolve(base) if session is not None else None
+            result = []
+            for line in out.splitlines():
+                branch, counts, oid = line.split("\t")
+                ahead, behind = map(int, counts.split())
+                if base_oid is not None:
+                    session.prime_counts(base_oid, oid, (ahead, behind))
+                result.append((branch, ahead, behind))
+            return result
+        if "ahead-behind" not in err:
+            raise RuntimeError(err)
+        _NO_AHEAD_BEHIND_ATOM.add(git)
+
+    if session is not None:
+        base_oid = session.resolve(base)
+        if base_oid is None:
+            raise RuntimeError(f"unknown revision: {base}")
+        refs = [rec.partition("\t")[::2] for rec in _ref_records(
+            git, "%(refname:short)%09%(objectname)", f"refs/remotes/{remote}/{prefix}", cwd
+        )]
+        branches = [branch for branch, _ in refs]
+
+        def count(ref):
+            return session.ahead_behind_oids(base_oid, ref[1])
+    else:
+        refs = branches = get_tracked_branches(remote, prefix, cwd=cwd, git=git)
+
+        def count(branch):
+            return commits_ahead_behind(base, branch, cwd=cwd, git=git)
+
+    counts = executor.map(count, refs) if executor is not None else map(count, refs)
+    return [(branch, ahead, behind) for branch, (ahead, behind) in zip(branches, counts)]
+
+
+def _ref_records(git, fmt, pattern, cwd):
+    """One for-each-ref record per ref matching pattern, formatted with fmt.
+
+    Records are NUL-terminated (for-each-ref has no -z): the raw output
+    is decoded and split once, with no strip() copy of the whole buffer
+    and no line-ending guessing. Raises RuntimeError if git fails.
+    """
+    code, out, err = run_git_raw(
+        [git, "for-each-ref", f"--format={fmt}%00", pattern], cwd=cwd
+    )
     if code != 0:
-        return set()
-    return set(out.splitlines()) if out else set()
+        raise RuntimeError(err)
+    # for-each-ref still ends each record with a newline, after our NUL
+    return out.decode(errors="replace").split("\0\n")[:-1]
+
+
+def get_tracked_branches(remote, prefix, cwd=None, git="git"):
+    """Get list of remote branches matching prefix."""
+    return _ref_records(git, "%(refname:short)", f"refs/remotes/{remote}/{prefix}", cwd)
+
 
+def iter_changed_files(base, tip, cwd=None, git="git"):
+    """Yield the files changed between base and tip, as raw bytes paths.
 
-def are_files_disjoint(branches, main_ref, remote, cwd=None, git="git"):
+    Streams `git diff --name-only -z` as it comes, so a caller that
+    stops early (are_files_disjoint on the first overlap) neither waits
+    for nor buffers the rest of the diff: the process is killed when the
+    generator is closed. Yields nothing if the diff fails.
+
+    Paths are only compared, never shown, so they are left undecoded;
+    NUL separators keep odd names (newlines, quoting) intact. Rename
+    detection is off: a rename is its old and new path, which is what
+    an overlap check wants anyway, and git skips the similarity search.
+    """
+    try:
+        p = subprocess.Popen(
+            [git, "diff", "--name-only", "-z", "--no-renames", f"{base}...{tip}"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=cwd,
+            env=repo_env(cwd)
+        )
+    except OSError:
+        return
+    try:
+        tail = b""
+        while chunk := p.stdout.read1(65536):
+            *paths, tail = (tail + chunk).split(b"\0")
+            yield from paths
+        if tail:
+            yield tail
+    finally:
+        if p.poll() is None:
+            p.kill()
+        p.stdout.close()
+        p.wait()
+
+
+def get_changed_files(base, tip, cwd=None, git="git"):
+    """Get set of files changed between base and tip (bytes paths)."""
+    return set(iter_changed_files(base, tip, cwd=cwd, git=git))
+
+
+def are_files_disjoint(branches, main_ref, remote, cwd=None, git="git",
+                       session=None, executor=None):
     """Check if all branches modify disjoint sets of files."""
-    all_files = []
-    for branch in branches:
-        files = get_changed_files(main_ref, f"{remote}/{branch}", cwd=cwd, git=git)
-        all_files.append(files)
+    return find_file_overlap(branches, main_ref, remote, cwd=cwd, git=git,
+                             session=session, executor=executor) is None
 
-    for i in range(len(all_files)):
-        for j in range(i + 1, len(all_files)):
-            if all_files[i] & all_files[j]:
-                return False
-    return True
+
+def find_file_overlap(branches, main_ref, remote, cwd=None, git="git",
+                      session=None, executor=None):
+    """Return an (earlier, later) pair of branches that modify a common
+    file, or None if all file sets are disjoint.
+
+    Single linear pass over all changed files: each path is recorded
+    with the index of the first branch that touched it, so a repeat
+    both signals the overlap and names the branch it collides with.
+    An overlap returns right away, without diffing the remaining
+    branches.
+
+    With an executor, the per-branch diffs run concurrently (results are
+    still checked in branch order; diffs not started yet are cancelled
+    on an early return). An in-process session is serialized on its
+    lock anyway, so it is queried inline.
+
+    With a session, the file sets it already holds in memory are checked
+    first: when the overlap is between branches that didn't move since
+    the last check, it is found without running a single diff.
+    """
+    def changed(branch):
+        tip = f"{remote}/{branch}"
+        if session is not None:
+            return session.changed_files(main_ref, tip)
+        if executor is not None:
+            return get_changed_files(main_ref, tip, cwd=cwd, git=git)
+        return iter_changed_files(main_ref, tip, cwd=cwd, git=git)
+
+    def pair(i, j):
+        # seen may hold a later branch than idx (cached sets go first)
+        return (branches[i], branches[j]) if i < j else (branches[j], branches[i])
+
+    # Sets are checked against the paths seen so far with C-level set
+    # ops on the dict's keys view; a streamed diff is checked file by
+    # file so it can stop early. (diff --name-only never lists a path
+    # twice for one branch.)
+    seen = {}  # path (or path hash) -> index of a branch with it
+    todo = range(len(branches))
+    if session is not None:
+        todo = []
+        for idx, branch in enumerate(branches):
+            files = session.cached_changed_files(main_ref, f"{remote}/{branch}")
+            if files is None:
+                todo.append(idx)
+                continue
+            common = seen.keys() & files
+            if common:
+                return pair(seen[next(iter(common))], idx)
+            seen.update(dict.fromkeys(files, idx))
+
+    pending = [branches[i] for i in todo]
+    if executor is not None and not (session is not None and session.in_process):
+        file_sets = executor.map(changed, pending)
+    else:
+        file_sets = map(changed, pending)
+
+    for idx, files in zip(todo, file_sets):
+        if isinstance(files, (set, frozenset)):
+            common = seen.keys() & files
+            if common:
+                return pair(seen[next(iter(common))], idx)
+            seen.update(dict.fromkeys(files, idx))
+        else:
+            for f in files:
+                if f in seen:
+                    return pair(seen[f], idx)
+                seen[f] = idx
+    return None
 
 
-def remote_ref_exists(remote, branch, cwd=None, git="git"):
+def remote_ref_exists(remote, branch, cwd=None, git="git", session=None):
     """Check if a remote tracking ref exists locally (e.g., origin/main)."""
-    code, _, _ = run_git(
+    if session is not None:
+        return session.resolve(f"refs/remotes/{remote}/{branch}") is not None
+    code, _, _ = run_git_raw(
         [git, "rev-parse", "--verify", f"refs/remotes/{remote}/{branch}"],
         cwd=cwd
     )
     return code == 0
 
 
-def local_main_ahead(remote, main, cwd=None, git="git"):
+def local_main_ahead(remote, main, cwd=None, git="git", session=None):
     """Check if local main is ahead of remote main.
 
+    Lookups go through session (a GitSession) when given.
+
     Returns:
         int: Number of commits ahead, or -1 if remote ref doesn't exist (bootstrap needed)
     """
     # Check if remote ref exists first
-    if not remote_ref_exists(remote, main, cwd=cwd, git=git):
+    if not remote_ref_exists(remote, main, cwd=cwd, git=git, session=session):
         # Remote main doesn't exist - need bootstrap push
         return -1
     try:
+        if session is not None:
+            return session.ahead_behind(f"{remote}/{main}", main)[0]
         return commits_ahead(f"{remote}/{main}", main, cwd=cwd, git=git)
     except Exception:
         return 0
 
 
+def parse_push_porcelain(out):
+    """Parse `git push --porcelain` output into {branch: (ok, summary)}.
+
+    Each ref line is "<flag>\t<src>:<dst>\t<summary>"; flag "!" means
+    rejected. Destination names are returned without "refs/heads/".
+    """
+    results = {}
+    for line in out.splitlines():
+        flag, sep, rest = line.partition("\t")
+        if not sep or len(flag) != 1:
+            continue  # "To <url>", "Done"
+        refs, _, summary = rest.partition("\t")
+        dst = refs.rpartition(":")[2]
+        if dst.startswith("refs/heads/"):
+            dst = dst[len("refs/heads/"):]
+        results[dst] = (flag != "!", summary)
+    return results
+
+
+def push_refspecs(remote, refspecs, cwd=None, git="git"):
+    """Push several refspecs in a single `git push` (one connection and
+    pack negotiation for all of them).
+
+    Returns (code, results, err) with results as parse_push_porcelain().
+    """
+    code, out, err = run_git([git, "push", "--porcelain", remote, *refspecs], cwd=cwd)
+    return code, parse_push_porcelain(out), err
+
+
 def delete_remote_branch(branch_name, remote, cwd=None, git="git"):
     """Delete a remote branch."""
     code, out, err = run_git([git, "push", remote, "--delete", branch_name], cwd=cwd)
     return code == 0, err
 
 
+# (path, git, mtime_ns of path) -> is_git_repo() answer from git/libgit2
+_repo_check_cache = {}
+
+
 def is_git_repo(path, git="git"):
-    """Check if path is a git repository."""
-    code, _, _ = run_git([git, "rev-parse", "--git-dir"], cwd=path)
-    return code == 0
+    """Check if path is a git repository.
+
+    A `.git` entry (a directory, or the file of a linked worktree or
+    submodule) answers with a single stat; only other layouts (a
+    subdirectory of a repo, a bare repo) ask git or libgit2, and that
+    answer is kept for the session while path's mtime doesn't change
+    (UI rebuilds re-validate every saved repo).
+    """
+    if os.path.exists(os.path.join(path, ".git")):
+        return True
+    try:
+        key = (str(path), git, os.stat(path).st_mtime_ns)
+    except OSError:
+        return False
+    hit = _repo_check_cache.get(key)
+    if hit is not None:
+        return hit
+    if pygit2 is not None and git == "git":
+        result = pygit2.discover_repository(str(path)) is not None
+    else:
+        code, _, _ = run_git_raw([git, "rev-parse", "--git-dir"], cwd=path)
+        result = code == 0
+    _repo_check_cache[key] = result
+    return result
 
 
 def get_short_head(cwd=None, git="git"):
@@ -5,7 +5,10 @@ GitHerd — Sound and notification module.
 Handles audio feedback and desktop notifications.
 """
 
+import ctypes
+import shutil
 import subprocess
+import threading
 
 
 SOUNDS = {
@@ -15,30 +18,79 @@ SOUNDS = {
     "bell": "/usr/share/sounds/freedesktop/stereo/bell.oga"
 }
 
+# Helper binaries, looked up once: a missing one is skipped without
+# attempting a fork on every sound/notification
+_PAPLAY = shutil.which("paplay")
+_NOTIFY_SEND = shutil.which("notify-send")
+
+# libcanberra (optional): plays the sound in-process instead of forking
+# paplay. Loaded on the first sound; None once it proved unusable.
+_canberra = None
+_canberra_ctx = None
+_canberra_tried = False
+_canberra_lock = threading.Lock()
+
+
+def _canberra_context():
+    """Return (lib, context) for libcanberra, or None if unavailable."""
+    global _canberra, _canberra_ctx, _canberra_tried
+    with _canberra_lock:
+        if not _canberra_tried:
+            _canberra_tried = True
+            try:
+                lib = ctypes.CDLL("libcanberra.so.0")
+                ctx = ctypes.c_void_p()
+                if lib.ca_context_create(ctypes.byref(ctx)) == 0:
+                    if lib.ca_context_open(ctx) == 0:
+                        _canberra, _canberra_ctx = lib, ctx
+                    else:
+                        lib.ca_context_destroy(ctx)
+            except (OSError, AttributeError):
+                pass
+        if _canberra is None:
+            return None
+        return _canberra, _canberra_ctx
+
+
+def _play_canberra(sound_file):
+    """Play sound_file through libcanberra; False if it can't."""
+    global _canberra
+    handle = _canberra_context()
+    if handle is None:
+        return False
+    lib, ctx = handle
+    # Variadic property list: key, value, …, NULL
+    if lib.ca_context_play(ctx, 0, b"media.filename", sound_file.encode(),
+                           b"media.role", b"event", None) != 0:
+        _canberra = None  # broken audio setup: stop trying, use paplay
+        return False
+    return True
+
 
 def play_sound(sound_type="bell"):
     """Play a notification sound."""
     sound_file = SOUNDS.get(sound_type, SOUNDS["bell"])
-    try:
-        subprocess.run(
-            ["paplay", sound_file],
-            stderr=subprocess.DEVNULL,
-            stdout=subprocess.DEVNULL
-        )
-    except FileNotFoundError:
+    if _play_canberra(sound_file):
+        return
+    if _PAPLAY is None:
         print("\a", end="", flush=True)
+        return
+    subprocess.run(
+        [_PAPLAY, sound_file],
+        stderr=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL
+    )
 
 
 def send_notification(title, message, urgency="normal"):
     """Send a desktop notification via notify-send."""
-    try:
-        subprocess.run(
-            ["notify-send", "-u", urgency, "-a", "GitHerd", title, message],
-            stderr=subprocess.DEVNULL,
-            stdout=subprocess.DEVNULL
-        )
-    except FileNotFoundError:
-        pass
+    if _NOTIFY_SEND is None:
+        return
+    subprocess.run(
+        [_NOTIFY_SEND, "-u", urgency, "-a", "GitHerd", title, message],
+        stderr=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL
+    )
 
 
 def play_beep():
@@ -11,6 +11,7 @@ from pathlib import Path
 import customtkinter as ctk
 
 from ..config import load_repo_config
+from ..git_utils import GitSession, unregister_repo_env
 from .ui import RepoTabUIMixin
 from .sync import RepoTabSyncMixin
 from .polling import RepoTabPollingMixin
@@ -40,15 +41,34 @@ class RepoTabContent(
         self.main = self.repo_config["main_branch"]
         self.prefix = self.repo_config["branch_prefix"]
         self.interval = self.repo_config["interval_seconds"]
+        self.refresh_if_hidden = self.repo_config["refresh_if_hidden"]
+        self.config_file = self.repo_path / "githerd.toml"
+        self._cfg_mtime = 0  # githerd.toml mtime last seen by the polling loop
+        self._cfg_interval = self.interval
 
         # State
         self.lock = threading.Lock()
+        self._sync_requested = False  # sync asked for while the lock was busy
+        self.last_sync_end = 0.0  # monotonic time the lock was last released
         self.polling = False
-        self.polling_thread = None
-        self.stop_event = threading.Event()
+        self.stop_event = threading.Event()  # set: no further polling tick
+        self._poll_job = None  # after() id of the pending polling tick
+        self._poll_gen = 0  # bumped on each polling start (see _start_poll_ticks)
+        self._poll_future = None  # last polling sync submitted to the pool
+        self._poll_wait_start = 0.0  # monotonic time the current wait began
+        self._pending_status = {}  # label attribute -> text waiting for _flush_status
+        self._status_flush_pending = False
+        self._status_flush_job = None  # after() id of the armed status flush
+        self._config_dialog = None  # Options dialog, withdrawn between uses
+        self._config_refill = None  # reloads its fields (see show_config_dialog)
         self.log_visible = not self.app.global_settings.get("start_collapsed", False)
         self.last_commit_count = {}
         self.pending_branches = []
+        self._branches_cache = None  # (refs, short names) of tracked branches, until the remote refs move
+        self._branches_stamp = None  # _remote_refs_stamp() when _branches_cache was filled
+        self._disjoint_cache = None  # (refs token, overlapping pair) of the last overlap check
+        self._idle_fingerprint = None  # refs snapshot of the last "nothing to do" sync
+        self._idle_ticks = 0  # consecutive "nothing to do" syncs (polling backoff)
         self.git_healthy = True
         self.git_error = ""
         self.sync_error = False  # red tab on mid-sync failures (pull/push refused, etc.)
@@ -60,12 +80,34 @@ class RepoTabContent(
         self.syncing = False
         self.base_tab_name = Path(repo_path).name
         self.advanced_mode = self.app.global_settings.get("advanced_mode", False)
+        # persistent ref lookups, backed by the on-disk state cache
+        self.gsess = GitSession(self.repo_path, self.git, store=self.app.state_cache)
+        # Per-branch read queries (counts, diffs) run concurrently on the
+        # app-wide git pool
+        self._pool = self.app.git_pool
 
         # Build UI
         self._build_ui()
 
         # Start initial scan
-        threading.Thread(target=self.initial_scan, daemon=True).start()
+        self.app.pool.submit(self.initial_scan)
+
+    def destroy(self):
+        """Reap the git helper processes along with the widget."""
+        self._poll_gen += 1  # a sync still in flight won't arm another tick
+        self._cancel_poll_tick()
+        if self._status_flush_job is not None:
+            self.after_cancel(self._status_flush_job)
+            self._status_flush_job = None
+        if self._log_flush_job is not None:
+            self.after_cancel(self._log_flush_job)
+            self._log_flush_job = None
+        if self._config_dialog is not None and self._config_dialog.winfo_exists():
+            self._config_dialog.destroy()  # a child of the app, not of the tab
+        self.gsess.close()
+        self.app.ref_watcher.unwatch(self)
+        unregister_repo_env(self.repo_path)
+        super().destroy()
 
 
 __all__ = ["RepoTabContent"]
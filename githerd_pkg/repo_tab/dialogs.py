@@ -5,8 +5,12 @@ GitHerd — RepoTab dialogs mixin.
 Handles configuration dialog and other repo-specific dialogs.
 """
 
+import shutil
 import subprocess
+import threading
+import time
 from pathlib import Path
+import tkinter as tk
 from tkinter import messagebox, filedialog
 from datetime import datetime
 import customtkinter as ctk
@@ -19,14 +23,36 @@ class RepoTabDialogsMixin:
     """Mixin for repo-specific dialogs."""
 
     def show_config_dialog(self):
-        """Show repository configuration dialog."""
+        """Show repository configuration dialog.
+
+        Built on first use, then only withdrawn on Save / Cancel / close:
+        later opens refill the fields from the current settings and show
+        the same window again.
+        """
+        dialog = self._config_dialog
+        if dialog is not None and dialog.winfo_exists():
+            self._config_refill()
+            dialog.title(f"Options — {self.repo_path.name}")
+            dialog.deiconify()
+            self.app.ensure_dialog_on_screen(dialog)
+            dialog.lift()
+            dialog.wait_visibility()
+            dialog.grab_set()
+            return
+
         dialog = ctk.CTkToplevel(self.app)
         dialog.title(f"Options — {self.repo_path.name}")
-        dialog.geometry("520x480")
+        dialog.geometry("520x520")
         dialog.transient(self.app)
         dialog.resizable(False, False)
         self.app.ensure_dialog_on_screen(dialog)
 
+        def close():
+            dialog.grab_release()
+            dialog.withdraw()
+
+        dialog.protocol("WM_DELETE_WINDOW", close)
+
         # Main frame with internal padding
         main_frame = ctk.CTkFrame(dialog)
         main_frame.pack(fill="both", expand=True, padx=15, pady=15)
@@ -39,18 +65,14 @@ class RepoTabDialogsMixin:
         # Alias (display name of the tab; leave empty to use the folder name)
         ctk.CTkLabel(main_frame, text="Alias:").grid(
             row=1, column=0, sticky="w", padx=15, pady=8)
-        current_alias = self.app.global_settings.get("tab_aliases", {}).get(
-            str(self.repo_path), ""
-        )
         alias_entry = ctk.CTkEntry(main_frame, width=250)
-        alias_entry.insert(0, current_alias)
         alias_entry.grid(row=1, column=1, columnspan=2, sticky="ew",
                          padx=(10, 15), pady=8)
 
         # Directory (re-point the tab to a different folder)
         ctk.CTkLabel(main_frame, text="Directory:").grid(
             row=2, column=0, sticky="w", padx=15, pady=8)
-        dir_var = ctk.StringVar(value=str(self.repo_path))
+        dir_var = ctk.StringVar()
         dir_entry = ctk.CTkEntry(main_frame, textvariable=dir_var, width=250)
         dir_entry.grid(row=2, column=1, sticky="ew", padx=(10, 5), pady=8)
 
@@ -71,32 +93,51 @@ class RepoTabDialogsMixin:
         ctk.CTkLabel(main_frame, text="Remote:").grid(
             row=3, column=0, sticky="w", padx=15, pady=8)
         remote_entry = ctk.CTkEntry(main_frame, width=250)
-        remote_entry.insert(0, self.remote)
         remote_entry.grid(row=3, column=1, columnspan=2, sticky="ew", padx=(10, 15), pady=8)
 
         # Main branch
         ctk.CTkLabel(main_frame, text="Main branch:").grid(
             row=4, column=0, sticky="w", padx=15, pady=8)
         main_entry = ctk.CTkEntry(main_frame, width=250)
-        main_entry.insert(0, self.main)
         main_entry.grid(row=4, column=1, columnspan=2, sticky="ew", padx=(10, 15), pady=8)
 
         # Branch prefix
         ctk.CTkLabel(main_frame, text="Branch prefix:").grid(
             row=5, column=0, sticky="w", padx=15, pady=8)
         prefix_entry = ctk.CTkEntry(main_frame, width=250)
-        prefix_entry.insert(0, self.prefix)
         prefix_entry.grid(row=5, column=1, columnspan=2, sticky="ew", padx=(10, 15), pady=8)
 
         # Interval
         ctk.CTkLabel(main_frame, text="Interval (sec):").grid(
             row=6, column=0, sticky="w", padx=15, pady=8)
         interval_entry = ctk.CTkEntry(main_frame, width=100)
-        interval_entry.insert(0, str(self.interval))
         interval_entry.grid(row=6, column=1, sticky="w", padx=(10, 15), pady=8)
 
+        # Hidden-tab polling rate
+        hidden_var = ctk.BooleanVar()
+        ctk.CTkCheckBox(main_frame, text="Full polling rate when the tab is not shown",
+                        variable=hidden_var).grid(
+            row=7, column=0, columnspan=3, sticky="w", padx=15, pady=8)
+
         main_frame.columnconfigure(1, weight=1)
 
+        def refill():
+            """Load the current settings into the fields (each open)."""
+            current_alias = self.app.global_settings.get("tab_aliases", {}).get(
+                str(self.repo_path), ""
+            )
+            for entry, value in ((alias_entry, current_alias),
+                                 (remote_entry, self.remote),
+                                 (main_entry, self.main),
+                                 (prefix_entry, self.prefix),
+                                 (interval_entry, str(self.interval))):
+                entry.delete(0, "end")
+                entry.insert(0, value)
+            dir_var.set(str(self.repo_path))
+            hidden_var.set(self.refresh_if_hidden)
+
+        refill()
+
         # Buttons
         btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
         btn_frame.pack(fill="x", padx=15, pady=15)
@@ -120,38 +161,54 @@ class RepoTabDialogsMixin:
                 self.interval = int(interval_entry.get().strip())
             except ValueError:
                 self.interval = 60
+            self.refresh_if_hidden = hidden_var.get()
 
             self.repo_config = {
                 "remote": self.remote,
                 "main_branch": self.main,
                 "branch_prefix": self.prefix,
-                "interval_seconds": self.interval
+                "interval_seconds": self.interval,
+                "refresh_if_hidden": self.refresh_if_hidden
             }
 
             try:
                 save_repo_config(self.repo_path, self.repo_config)
                 self.log_msg("Configuration saved")
-                self.check_and_update_health()
+                self.app.pool.submit(self.check_and_update_health)
             except Exception as e:
                 messagebox.showerror("Error", f"Unable to save: {e}", parent=dialog)
                 return
 
-            dialog.destroy()
+            close()
 
         ctk.CTkButton(btn_frame, text="Save", command=save_config).pack(side="left", padx=5)
-        ctk.CTkButton(btn_frame, text="Cancel", command=dialog.destroy).pack(side="left", padx=5)
+        ctk.CTkButton(btn_frame, text="Cancel", command=close).pack(side="left", padx=5)
+
+        self._config_dialog = dialog
+        self._config_refill = refill
 
         # Grab focus after widgets are created
         dialog.wait_visibility()
         dialog.grab_set()
 
+    # Looked up once: None when there is no xdg-open on PATH
+    _XDG_OPEN = shutil.which("xdg-open")
+
     def open_folder(self):
         """Open the repository folder in file manager."""
+        if self._XDG_OPEN is None:
+            return
+        # Waited for on a thread of its own, not the UI thread: xdg-open
+        # may take its time handing over to the file manager (some even
+        # stay in the foreground), but it must still be reaped, not left
+        # as a zombie
         try:
-            subprocess.run(["xdg-open", str(self.repo_path)],
-                          stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
-        except:
-            pass
+            proc = subprocess.Popen([self._XDG_OPEN, str(self.repo_path)],
+                                    stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError:
+            return
+        threading.Thread(target=proc.wait, daemon=True, name="githerd-xdg-open").start()
 
     def delete_branch(self, branch_name):
         """Delete a remote branch."""
@@ -165,34 +222,45 @@ class RepoTabDialogsMixin:
                 return
 
         self.log_msg(f"Deleting {branch_name}…")
-        success, err = delete_remote_branch(branch_name, self.remote,
-                                           cwd=self.repo_path, git=self.git)
 
-        if success:
-            self.log_msg(f"Branch {branch_name} deleted")
-            self.app.update_repo_menu()
-            self.manual_sync()
-        else:
-            self.log_msg(f"Error: {err}")
+        def done(result):
+            success, err = result
+            if success:
+                self.log_msg(f"Branch {branch_name} deleted")
+                self.invalidate_branches()
+                self.app.schedule_repo_menu_update()
+                self.manual_sync()
+            else:
+                self.log_msg(f"Error: {err}")
+
+        self.app.run_in_worker(
+            lambda: delete_remote_branch(branch_name, self.remote,
+                                         cwd=self.repo_path, git=self.git),
+            done
+        )
 
     def _on_log_right_click(self, event):
         """Show context menu on log right-click."""
-        import tkinter as tk
+        # Built once per tab (a child of it, so it goes with the tab);
+        # recolored only when the appearance mode changed since.
         # Inherit the menubar font/colors for size+style consistency.
         colors = getattr(self.app, "menu_colors", None)
-        menu = tk.Menu(
-            self.app, tearoff=0,
-            font=getattr(self.app, "menu_font", None),
-            bg=colors["bg"] if colors else None,
-            fg=colors["fg"] if colors else None,
-            activebackground=colors["active_bg"] if colors else None,
-            activeforeground=colors["active_fg"] if colors else None,
-        )
-        menu.add_command(label="Copy", command=self.copy_log)
-        menu.tk_popup(event.x_root, event.y_root)
+        if self._log_menu is None:
+            self._log_menu = tk.Menu(self, tearoff=0, font=getattr(self.app, "menu_font", None))
+            self._log_menu.add_command(label="Copy", command=self.copy_log)
+        if colors is not None and colors is not self._log_menu_colors:
+            self._log_menu.configure(
+                bg=colors["bg"], fg=colors["fg"],
+                activebackground=colors["active_bg"],
+                activeforeground=colors["active_fg"],
+            )
+            self._log_menu_colors = colors
+        self._log_menu.tk_popup(event.x_root, event.y_root)
 
     def copy_log(self):
         """Copy selected text, or all log content if no selection."""
+        if self.log is None:
+            return
         try:
             # Check for selection in the internal text widget
             sel_ranges = self.log._textbox.tag_ranges("sel")
@@ -212,36 +280,89 @@ class RepoTabDialogsMixin:
 
         log_msg is called from worker threads (polling/sync). Writing to
         the Tk textbox off the main thread can deadlock the Tcl
-        interpreter, so the actual widget mutation is marshalled onto
-        the main loop via the app dispatcher. Message ordering is
-        preserved because all calls share the single ui_call queue.
+        interpreter, so lines are queued here and written by
+        _flush_log on the main loop. A sync logs dozens of lines in a
+        burst; they are batched into one textbox update per
+        LOG_FLUSH_MS instead of four Tk calls per line. Ordering is
+        preserved (single FIFO).
 
         color: optional hex string (e.g. "#ff9500"); when given, the
         line is rendered in that color via a Tk text tag.
         """
-        ts = datetime.now().strftime("%H:%M:%S")
-        line = f"[{ts}] {txt}\n"
-
-        def _write():
-            self.log.configure(state="normal")
-            tag = None
+        # Only the raw timestamp is taken here; formatting happens in
+        # _flush_log, off the git worker threads.
+        self._log_queue.append((time.time(), txt, color))
+        if not self._log_flush_pending:
+            self._log_flush_pending = True
+            self.app.ui_call(self._schedule_log_flush)
+
+    LOG_FLUSH_MS = 50  # batching window for queued log lines
+
+    def _schedule_log_flush(self):
+        """Arm the batched log flush (main thread; self.after is not
+        safe to call from the worker that queued the line)."""
+        if not self.winfo_exists():
+            return  # closed before the main loop got here
+        self._log_flush_job = self.after(self.LOG_FLUSH_MS, self._flush_log)
+
+    def _flush_log(self):
+        """Write every queued log line in one textbox update."""
+        self._log_flush_job = None
+        if not self.winfo_exists():
+            return
+        # Reset the flag BEFORE draining: a line queued while we drain is
+        # either picked up below or arms a new flush — never lost.
+        self._log_flush_pending = False
+        lines = []
+        sec, ts = None, ""
+        while self._log_queue:
+            t, txt, color = self._log_queue.popleft()
+            if int(t) != sec:  # a burst mostly shares one second
+                sec = int(t)
+                ts = time.strftime("%H:%M:%S", time.localtime(t))
+            lines.append((f"[{ts}] {txt}\n", color))
+        if lines:
+            self._write_log_lines(lines)
+
+    def _write_log_lines(self, lines):
+        """Append (line, color) pairs to the log textbox (main thread only).
+        Until the textbox is built (see _materialize_log) they are buffered."""
+        if self.log is None:
+            self._log_backlog.extend(lines)
+            return
+        # One Tk insert for the whole batch: text, tags, text, tags…
+        chunks = []
+        for line, color in lines:
+            tag = ""
             if color:
                 tag = "c" + color.lstrip("#")
-                try:
-                    self.log._textbox.tag_config(tag, foreground=color)
-                except Exception:
-                    tag = None
-            try:
-                if tag:
-                    self.log.insert("end", line, tag)
-                else:
-                    self.log.insert("end", line)
-            except Exception:
-                self.log.insert("end", line)
+                if tag not in self._log_tags:
+                    try:
+                        self.log._textbox.tag_config(tag, foreground=color)
+                        self._log_tags.add(tag)
+                    except Exception:
+                        tag = ""
+            chunks.append(line)
+            chunks.append(tag)
+        # The textbox stays editable (see _materialize_log), so this is
+        # one insert with no state toggles around it
+        text = self.log._textbox
+        text.insert("end", *chunks)
+        # Drop the oldest lines past max_log_lines: a long-running tab
+        # keeps a constant-size widget instead of one that slows down
+        # with every insert
+        cap = int(self.app.global_settings.get("max_log_lines", 2000) or 0)
+        if cap > 0:
+            # Every line ends with "\n": "end-1c" is on the empty line after
+            excess = int(text.index("end-1c").split(".")[0]) - 1 - cap
+            if excess > 0:
+                text.delete("1.0", f"{excess + 1}.0")
+        # Scrolling a collapsed log only costs a layout pass nobody
+        # sees; toggle_log scrolls to the end when it is shown again
+        if self.log_visible:
             self.log.see("end")
-            self.log.configure(state="disabled")
 
-        self.app.ui_call(_write)
+    EXPORT_CHUNK_LINES = 500  # log lines read from the textbox per write in export_log
 
     def export_log(self):
         """Export log to file."""
@@ -253,12 +374,23 @@ class RepoTabDialogsMixin:
         )
         if filename:
             try:
-                content = self.log.get("1.0", "end")
-                with open(filename, "w") as f:
-                    f.write(f"GitHerd Log - {self.repo_path}\n")
-                    f.write(f"Exported: {datetime.now()}\n")
-                    f.write("=" * 50 + "\n\n")
-                    f.write(content)
+                # Binary: each chunk is encoded once and written as is,
+                # no newline translation ("\n" on every platform)
+                with open(filename, "wb", buffering=1 << 20) as f:
+                    f.write((f"GitHerd Log - {self.repo_path}\n"
+                             f"Exported: {datetime.now()}\n"
+                             + "=" * 50 + "\n\n").encode("utf-8"))
+                    # Copied out of the textbox a slice at a time rather
+                    # than as one string the size of the whole log
+                    if self.log is not None:
+                        step = self.EXPORT_CHUNK_LINES
+                        last = int(self.log.index("end-1c").split(".")[0])
+                        for i in range(1, last + 1, step):
+                            chunk = self.log.get(f"{i}.0", f"{i + step}.0")
+                            f.write(chunk.encode("utf-8", "replace"))
+                    else:
+                        f.write("".join(line for line, _ in self._log_backlog)
+                                .encode("utf-8", "replace"))
                 self.log_msg(f"Log exported to {filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Unable to export: {e}", parent=self)
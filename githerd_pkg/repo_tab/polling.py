@@ -2,19 +2,24 @@
 """
 GitHerd — RepoTab polling mixin.
 
-Handles polling loop, countdown, and initial scan.
+Handles polling ticks, countdown, and initial scan.
 """
 
+import os
 import time
-import threading
+from concurrent.futures import wait
 
 from ..config import load_repo_config, load_global_settings
 from ..git_utils import (
-    run_git, get_tracked_branches, commits_ahead, commits_behind,
-    local_main_ahead, are_files_disjoint, check_git_health, get_short_head,
-    get_remote_url
+    get_branches_with_ahead_behind,
+    local_main_ahead, remote_ref_exists, check_git_health,
+    get_short_head, get_remote_url, register_repo_env, unregister_repo_env
 )
 
+# Interval multiplier for a tab that isn't shown, when its repo config
+# sets refresh_if_hidden = false
+HIDDEN_POLL_FACTOR = 10
+
 
 class RepoTabPollingMixin:
     """Mixin for polling and initial scan operations."""
@@ -41,7 +46,11 @@ class RepoTabPollingMixin:
             else:
                 self.log_msg(f"  remote URL: (could not resolve)")
             self.disable_tab(err)
+            self.app.ref_watcher.unwatch(self)
+            unregister_repo_env(self.repo_path)
         else:
+            register_repo_env(self.repo_path, self.git)
+            self.app.ref_watcher.watch(self)
             self.enable_tab()
 
         return ok
@@ -52,46 +61,46 @@ class RepoTabPollingMixin:
             self.log_msg(f"Error: {self.git_error}")
             return
 
+        self._show_last_known()
         try:
-            run_git([self.git, "fetch", self.remote], cwd=self.repo_path)
+            self.app.fetch_remote(self)
+            self._revalidate_branches()
 
             local_ahead = local_main_ahead(self.remote, self.main,
-                                          cwd=self.repo_path, git=self.git)
+                                          cwd=self.repo_path, git=self.git,
+                                          session=self.gsess)
             if local_ahead > 0:
                 self.set_state("Local main ahead")
                 self.set_info(f"+{local_ahead} commits to push — click Sync now")
                 return
 
-            branches = get_tracked_branches(self.remote, self.prefix,
-                                           cwd=self.repo_path, git=self.git)
+            branch_counts = get_branches_with_ahead_behind(
+                self.remote, self.main, self.prefix,
+                cwd=self.repo_path, git=self.git,
+                session=self.gsess, executor=self._pool
+            )
+            _, short_names = self._cache_branches(b for b, _, _ in branch_counts)
 
             ahead_list = []
             diverged_list = []
+            ahead_counts = {}
 
-            for b in branches:
-                ahead = commits_ahead(f"{self.remote}/{self.main}", b,
-                                     cwd=self.repo_path, git=self.git)
-                behind = commits_behind(f"{self.remote}/{self.main}", b,
-                                       cwd=self.repo_path, git=self.git)
-
+            for short_name, (_, ahead, behind) in zip(short_names, branch_counts):
                 if ahead > 0:
-                    short_name = b.replace(f"{self.remote}/", "")
-                    self.last_commit_count[short_name] = ahead
+                    ahead_counts[short_name] = ahead
 
                     if behind > 0:
                         diverged_list.append((short_name, ahead, behind))
                     else:
                         ahead_list.append(short_name)
+            self.last_commit_count = ahead_counts
 
             total = len(ahead_list) + len(diverged_list)
 
             if total == 0:
                 behind_list = []
-                for b in branches:
-                    behind = commits_behind(f"{self.remote}/{self.main}", b,
-                                           cwd=self.repo_path, git=self.git)
+                for short_name, (_, _, behind) in zip(short_names, branch_counts):
                     if behind > 0:
-                        short_name = b.replace(f"{self.remote}/", "")
                         behind_list.append((short_name, behind))
 
                 if behind_list:
@@ -108,8 +117,7 @@ class RepoTabPollingMixin:
                 all_names = [b[0] for b in diverged_list] + ahead_list
                 self.pending_branches = all_names
 
-                disjoint = are_files_disjoint(all_names, f"{self.remote}/{self.main}",
-                                             self.remote, cwd=self.repo_path, git=self.git)
+                disjoint = self.files_disjoint(all_names)
 
                 if len(diverged_list) > 0:
                     diverged_info = [f"{b[0]} (+{b[1]}/-{b[2]})" for b in diverged_list]
@@ -134,42 +142,156 @@ class RepoTabPollingMixin:
             self.set_state("ERROR")
             self.set_info(str(e))
             self.app.ui_call(lambda: self.app.update_tab_color(self))
+        finally:
+            # Fill the branch cache here, on the worker, so the
+            # Repository menu (which only reads the cache) can offer
+            # the branch entries the next time it opens
+            try:
+                self.tracked_branches()
+            except Exception:
+                pass
+
+    def _show_last_known(self):
+        """Show what the remote-tracking refs said before this run's
+        first fetch, so the tab isn't blank while the fetch runs.
+
+        Branches that didn't move since the last session are answered by
+        the state cache, without walking history.
+        """
+        try:
+            branch_counts = get_branches_with_ahead_behind(
+                self.remote, self.main, self.prefix,
+                cwd=self.repo_path, git=self.git,
+                session=self.gsess, executor=self._pool
+            )
+        except Exception:
+            return
+        remote_prefix = f"{self.remote}/"
+        ahead = [b.removeprefix(remote_prefix) for b, a, _ in branch_counts if a > 0]
+        if ahead:
+            self.set_info(f"Last known ahead: {', '.join(ahead)} — fetching…")
+
+    def _start_poll_ticks(self):
+        """Begin polling (main thread): one sync right away, then one
+        per interval.
+
+        There is no polling thread: the wait between syncs is a Tk
+        timer (_poll_tick) and each sync runs on the app's shared pool.
+        Every start bumps _poll_gen; timers and sync completions of an
+        earlier start carry the old number and drop out, so a quick
+        stop/start never ends up with two tick chains.
+        """
+        self._poll_gen += 1
+        self._poll_future = self.app.pool.submit(self._poll_sync, self._poll_gen)
+
+    def _cancel_poll_tick(self):
+        """Cancel the pending polling timer, if any (main thread)."""
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+
+    def _schedule_poll_tick(self, delay, gen):
+        self._cancel_poll_tick()
+        self._poll_job = self.after(int(delay * 1000), lambda: self._poll_tick(gen))
+
+    def _poll_tick(self, gen):
+        """Polling timer (main thread): start the next sync once the
+        wait is over.
+
+        The wait runs in steps of the base interval and the effective
+        interval is re-evaluated at each step, so activity
+        (note_activity) or showing the tab cuts a stretched wait short.
+        """
+        self._poll_job = None
+        if gen != self._poll_gen or not self.polling or self.stop_event.is_set():
+            return
+        base = self._poll_interval()
+        remaining = self._poll_wait_start + self._effective_interval(base) - time.monotonic()
+        if remaining > 0:
+            self._schedule_poll_tick(min(remaining, base), gen)
+            return
+        self._poll_future = self.app.pool.submit(self._poll_sync, gen)
 
-    def polling_loop(self):
-        """Polling loop running in its own thread.
+    def _poll_sync(self, gen):
+        """One polling sync (worker), then back to the main thread to
+        arm the next wait."""
+        try:
+            self.sync()
+        finally:
+            self.app.ui_call(lambda: self._after_poll_sync(gen))
 
-        Uses stop_event for clean shutdown:
-        - Thread waits for either timeout or stop signal
-        - Current sync always completes before stopping
+    def _after_poll_sync(self, gen):
+        """Arm the next tick after a polling sync (main thread).
 
-        The try/finally guarantees that whatever exit path we take
-        (clean stop, exception, sync error calling stop_polling) the
-        polling flag and button color end up consistent — the link
-        between `self.polling` and the green/red button is permanent.
+        If polling was stopped meanwhile (by the user or by the sync
+        itself, on error), make sure the button and tab color say so
+        — the link between `self.polling` and the green/red button is
+        permanent.
         """
-        try:
-            while not self.stop_event.is_set():
-                self.sync()  # Blocking - completes before checking stop_event
-
-                # Reload interval (may have changed)
-                try:
-                    cfg = load_repo_config(self.repo_path)
-                    interval = cfg.get("interval_seconds", self.interval)
-                except Exception:
-                    interval = self.interval
-
-                self.next_poll_time = time.time() + interval
-
-                # Wait for interval OR stop signal
-                # wait() returns True if event is set, False on timeout
-                if self.stop_event.wait(timeout=interval):
-                    break  # Stop signal received
-        finally:
-            # Defensive — guarantee the UI matches reality on ANY exit
+        if gen != self._poll_gen:
+            return  # stopped and restarted meanwhile: that start has its own chain
+        if not self.polling or self.stop_event.is_set():
             self.polling = False
-            self.app.ui_call(lambda: self.btn_poll.configure(text="▶ Start polling"))
-            self.app.ui_call(self.stop_countdown)
-            self.app.ui_call(lambda: self.app.update_tab_color(self))
+            self.btn_poll.configure(text="▶ Start polling")
+            self.stop_countdown()
+            self.app.update_tab_color(self)
+            return
+        # Reload interval (may have changed)
+        base = self._poll_interval()
+        interval = self._effective_interval(base)
+        self._poll_wait_start = time.monotonic()
+        self.next_poll_time = time.time() + interval
+        self._schedule_poll_tick(min(interval, base), gen)
+
+    def _poll_interval(self):
+        """Polling interval from githerd.toml.
+
+        The file is only re-parsed when its mtime changed since the last
+        tick — one stat() per tick instead of open + TOML parse.
+        """
+        try:
+            mtime = os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            mtime = None  # no file: defaults apply
+        if mtime != self._cfg_mtime:
+            self._cfg_mtime = mtime
+            try:
+                cfg = load_repo_config(self.repo_path)
+                self._cfg_interval = cfg.get("interval_seconds", self.interval)
+                self.refresh_if_hidden = cfg.get("refresh_if_hidden", True)
+            except Exception:
+                self._cfg_interval = self.interval
+        return self._cfg_interval
+
+    def _effective_interval(self, base):
+        """Seconds until the next sync: the configured interval, stretched
+        for an idle repo and for a hidden tab that opted out of
+        refresh_if_hidden."""
+        interval = self._backoff_interval(base)
+        if not self.refresh_if_hidden and self.app.current_tab != self.tab_name:
+            interval = max(interval, base * HIDDEN_POLL_FACTOR)
+        return interval
+
+    def _backoff_interval(self, base):
+        """Polling interval stretched for a repo that keeps finding
+        nothing to do: doubled every 3 idle syncs (at most x16), capped
+        at the idle_backoff_max_seconds setting (0 = off)."""
+        try:
+            cap = int(self.app.global_settings.get("idle_backoff_max_seconds", 900) or 0)
+        except (TypeError, ValueError):
+            cap = 0
+        if cap <= base or self._idle_ticks < 3:
+            return base
+        return min(base * 2 ** min(self._idle_ticks // 3, 4), cap)
+
+    def note_activity(self):
+        """User or repo activity: back to the configured interval. A
+        backed-off wait ends at its next base-interval step."""
+        if self._idle_ticks:
+            self._idle_ticks = 0
+            if self.polling:
+                self.next_poll_time = min(self.next_poll_time,
+                                          time.time() + self._cfg_interval)
 
     def toggle_polling(self):
         """Toggle polling on/off."""
@@ -181,7 +303,8 @@ class RepoTabPollingMixin:
             # auto-retry resume intent)
             self.polling = False
             self.polling_interrupted = False
-            self.stop_event.set()  # Signal thread to stop
+            self.stop_event.set()  # in-flight sync: no next tick
+            self._cancel_poll_tick()
             self.btn_poll.configure(text="▶ Start polling")
             self.stop_countdown()
         else:
@@ -189,16 +312,12 @@ class RepoTabPollingMixin:
             self.polling = True
             self.polling_interrupted = False
             self.last_activity_time = time.time()  # fresh grace period
+            self._idle_ticks = 0
             self.stop_event.clear()  # Reset event
             self.btn_poll.configure(text="⏸ Stop polling")
             self.next_poll_time = time.time() + self.interval
             self.start_countdown()
-            self.polling_thread = threading.Thread(
-                target=self.polling_loop,
-                daemon=True,
-                name=f"polling-{self.tab_name}"
-            )
-            self.polling_thread.start()
+            self._start_poll_ticks()
 
         self.app.update_tab_color(self)
         self.app.update_title()
@@ -207,10 +326,9 @@ class RepoTabPollingMixin:
         """Stop polling. Thread-safe: callable from sync error paths
         (worker thread) as well as menu callbacks (main thread).
 
-        Sets the stop_event so the polling_loop actually exits — without
-        this, the loop would only see self.polling=False but keep
-        looping forever, producing the "gray button while still
-        polling" symptom.
+        Sets the stop_event so no further tick is armed — without this,
+        an in-flight sync could schedule the next one, producing the
+        "gray button while still polling" symptom.
 
         stop_polling is only reached from error paths (sync/merge
         failures); the normal user stop goes through toggle_polling /
@@ -245,7 +363,7 @@ class RepoTabPollingMixin:
             # (and re-sets it if the underlying problem persists).
             self._do_sync()
         finally:
-            self.lock.release()
+            self._release_sync_lock()
 
         if self.polling_interrupted and self.git_healthy and not self.sync_error:
             self.polling_interrupted = False
@@ -275,37 +393,43 @@ class RepoTabPollingMixin:
                 self.log_msg("Watch: change detected → starting polling")
                 self.app.ui_call(self._start_polling_if_idle)
         finally:
-            self.lock.release()
+            self._release_sync_lock()
 
     def _detect_pending_work(self):
         """Return True if, after a fetch, the repo is non-idle: local
         main ahead / remote main missing, or any enabled tracked branch
         ahead of or behind main. Read-only; swallows git errors."""
         try:
-            code, _, _ = run_git([self.git, "fetch", self.remote], cwd=self.repo_path)
+            code, _, _ = self.app.fetch_remote(self)
+            self._revalidate_branches()
             if code != 0:
                 return False
 
-            local_ahead = local_main_ahead(self.remote, self.main,
-                                           cwd=self.repo_path, git=self.git)
-            if local_ahead != 0:  # >0 ahead, or -1 bootstrap needed
-                return True
-
-            branches = get_tracked_branches(self.remote, self.prefix,
-                                            cwd=self.repo_path, git=self.git)
+            # Only presence matters here, not the count
+            if not remote_ref_exists(self.remote, self.main, cwd=self.repo_path,
+                                     git=self.git, session=self.gsess):
+                return True  # bootstrap push needed
+            try:
+                if self.gsess.is_ahead(f"{self.remote}/{self.main}", self.main):
+                    return True  # local main ahead
+            except RuntimeError:
+                pass  # no local main: nothing to push, still scan the branches
+
+            branch_counts = get_branches_with_ahead_behind(
+                self.remote, self.main, self.prefix,
+                cwd=self.repo_path, git=self.git,
+                session=self.gsess, executor=self._pool
+            )
+            _, short_names = self._cache_branches(b for b, _, _ in branch_counts)
             settings = load_global_settings()
             branch_states = settings.get("branch_update_enabled", {}).get(
                 str(self.repo_path), {}
             )
             default_enabled = settings.get("sync_new_branches_by_default", False)
-            base = f"{self.remote}/{self.main}"
-            for b in branches:
-                short = b.replace(f"{self.remote}/", "")
+            for short, (_, ahead, behind) in zip(short_names, branch_counts):
                 if not branch_states.get(short, default_enabled):
                     continue
-                if commits_ahead(base, b, cwd=self.repo_path, git=self.git) > 0:
-                    return True
-                if commits_behind(base, b, cwd=self.repo_path, git=self.git) > 0:
+                if ahead > 0 or behind > 0:
                     return True
         except Exception:
             return False
@@ -318,17 +442,27 @@ class RepoTabPollingMixin:
         if not self.polling and self.git_healthy:
             self.toggle_polling()
 
-    def wait_for_polling_thread(self, timeout=None):
-        """Wait for polling thread to finish.
+    def wait_for_polling_sync(self, timeout=None):
+        """Wait for an in-flight polling sync to finish.
 
         Args:
             timeout: Max wait time in seconds (None = infinite)
         Returns:
-            True if thread stopped, False if timeout
+            True if no polling sync is running anymore, False if timeout
         """
-        if self.polling_thread and self.polling_thread.is_alive():
-            self.polling_thread.join(timeout=timeout)
-            return not self.polling_thread.is_alive()
+        if self._poll_future is None:
+            return True
+        wait([self._poll_future], timeout=timeout)
+        return self._poll_future.done()
+
+    def when_poll_done(self, fn):
+        """Have fn() called (on a worker thread) once the in-flight
+        polling sync completes. Returns False, without calling fn, when
+        none is in flight."""
+        fut = self._poll_future
+        if fut is None or fut.done():
+            return False
+        fut.add_done_callback(lambda _f: fn())
         return True
 
     def start_countdown(self):
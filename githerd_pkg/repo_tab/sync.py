@@ -5,15 +5,35 @@ GitHerd — RepoTab sync mixin.
 Handles synchronization logic, push, and merge operations.
 """
 
-import threading
+import os
+import time
 
-from ..config import load_global_settings, save_global_settings, load_repo_config
+from ..config import (
+    SETTINGS_FILE, load_global_settings, save_global_settings, load_repo_config
+)
 from ..git_utils import (
-    run_git, get_tracked_branches, commits_ahead, commits_behind,
-    local_main_ahead, are_files_disjoint, get_short_head, get_remote_url
+    run_git, run_git_stream, get_tracked_branches, get_branches_with_ahead_behind,
+    push_refspecs, local_main_ahead, find_file_overlap, get_short_head, get_remote_url, repo_env
 )
 from ..notifications import play_sound, send_notification
 
+# Per-branch status lines, logged for every branch on every sync:
+# templates are bound once instead of re-parsed per f-string.
+_FMT_DIVERGED = "  {}: +{}/-{} (DIVERGED)".format
+_FMT_AHEAD = "  {}: +{} commits".format
+_FMT_BEHIND = "  {}: -{} commits (behind)".format
+
+
+def _stat_tree(root, stamps):
+    """Append (path, mtime) of root and every directory below it.
+    Raises OSError (e.g. root missing)."""
+    todo = [root]
+    while todo:
+        path = todo.pop()
+        stamps.append((path, os.stat(path).st_mtime_ns))
+        with os.scandir(path) as it:
+            todo.extend(e.path for e in it if e.is_dir(follow_symlinks=False))
+
 
 class RepoTabSyncMixin:
     """Mixin for sync and merge operations."""
@@ -24,28 +44,44 @@ class RepoTabSyncMixin:
         Runs in a worker thread; UI mutations must be marshalled via
         self.app.ui_call (self.after is not thread-safe in this Tcl
         build).
+
+        The lock keeps two git operations from racing in the same
+        working tree. If it is busy (another sync, a merge, a watch
+        fetch…), the request is remembered rather than dropped: the
+        holder re-runs one sync when it releases the lock (see
+        _release_sync_lock).
         """
         if not self.lock.acquire(blocking=False):
-            return
+            self._sync_requested = True
+            # The holder may have released between our attempt and the
+            # flag being set — retry once so the request can't slip
+            # through that gap.
+            if not self.lock.acquire(blocking=False):
+                return
+        self._sync_requested = False
         try:
             # Show sync indicator on tab
             self.syncing = True
             self.app.ui_call(lambda: self.app.update_tab_color(self))
             self._do_sync()
         finally:
-            # Hide sync indicator
             self.syncing = False
-            self.app.ui_call(lambda: self.app.update_tab_color(self))
-            # Update Repository menu if this tab is active
-            self.app.ui_call(
-                lambda: self.app.update_repo_menu()
-                if self.app.get_current_tab() == self
-                else None
-            )
-            self.lock.release()
+            self._release_sync_lock()
+        # Hide sync indicator
+        self.app.ui_call(lambda: self.app.update_tab_color(self))
+
+    def _release_sync_lock(self):
+        """Release the sync lock, then run the sync that was requested
+        while it was held, if any."""
+        self.last_sync_end = time.monotonic()
+        self.lock.release()
+        if self._sync_requested and self.git_healthy:
+            self.app.pool.submit(self.sync)
 
     def _do_sync(self):
         """Perform the actual sync operation."""
+        # Counts toward the polling backoff only if this sync ends idle
+        idle_ticks, self._idle_ticks = self._idle_ticks, 0
         self.set_state("Sync…")
         self.hide_merge_button()
         self.pending_branches = []
@@ -54,7 +90,8 @@ class RepoTabSyncMixin:
         self.sync_error = False
 
         self.log_msg(f"git fetch {self.remote}")
-        code, _, err = run_git([self.git, "fetch", self.remote], cwd=self.repo_path)
+        code, _, err = self.app.fetch_remote(self)
+        self._revalidate_branches()  # the fetch may have added/removed branches
         if code != 0:
             self.log_msg(f"ERROR fetch: {err}")
             url = get_remote_url(self.remote, cwd=self.repo_path, git=self.git)
@@ -66,8 +103,20 @@ class RepoTabSyncMixin:
             self.stop_polling()
             return
 
+        # Last sync found nothing to do and no ref (nor the branch
+        # settings) changed since: the analysis would say the same.
+        fingerprint = self._refs_fingerprint()
+        if fingerprint is not None and fingerprint == self._idle_fingerprint:
+            self.set_state("Idle")
+            self.set_info("All branches are synchronized")
+            self.log_msg("No ref changed — nothing to do")
+            self._idle_ticks = idle_ticks + 1
+            return
+        self._idle_fingerprint = None
+
         local_ahead = local_main_ahead(self.remote, self.main,
-                                       cwd=self.repo_path, git=self.git)
+                                       cwd=self.repo_path, git=self.git,
+                                       session=self.gsess)
 
         if local_ahead == -1:
             # Remote main doesn't exist - bootstrap push
@@ -98,8 +147,14 @@ class RepoTabSyncMixin:
                 self.app.record_event(self.tab_name, get_short_head(self.repo_path, self.git), self.main)
             return
 
-        all_branches = get_tracked_branches(self.remote, self.prefix,
-                                        cwd=self.repo_path, git=self.git)
+        # One scan gives every branch with its ahead/behind counts vs
+        # main; everything below is classified from it.
+        branch_counts = get_branches_with_ahead_behind(
+            self.remote, self.main, self.prefix,
+            cwd=self.repo_path, git=self.git,
+            session=self.gsess, executor=self._pool
+        )
+        all_branches, short_names = self._cache_branches(b for b, _, _ in branch_counts)
 
         # Filter out disabled branches
         settings = load_global_settings()
@@ -107,15 +162,14 @@ class RepoTabSyncMixin:
         default_enabled = settings.get("sync_new_branches_by_default", False)
         branches = []
         disabled_count = 0
-        for b in all_branches:
-            short_name = b.replace(f"{self.remote}/", "")
+        for short_name, (_, ahead, behind) in zip(short_names, branch_counts):
             if branch_states.get(short_name, default_enabled):
-                branches.append(b)
+                branches.append((short_name, ahead, behind))
             else:
                 disabled_count += 1
 
         # Clean up non-existent branches from persistence
-        existing_short_names = {b.replace(f"{self.remote}/", "") for b in all_branches}
+        existing_short_names = set(short_names)
         repo_path_str = str(self.repo_path)
         if repo_path_str in settings.get("branch_update_enabled", {}):
             saved_branches = list(settings["branch_update_enabled"][repo_path_str].keys())
@@ -134,28 +188,26 @@ class RepoTabSyncMixin:
 
         ahead_branches = []
         diverged_branches = []
-        new_commits_detected = False
-
-        for b in branches:
-            ahead = commits_ahead(f"{self.remote}/{self.main}", b,
-                                 cwd=self.repo_path, git=self.git)
-            behind = commits_behind(f"{self.remote}/{self.main}", b,
-                                   cwd=self.repo_path, git=self.git)
+        # Rebuilt each sync: branches no longer ahead (synced, deleted,
+        # disabled) drop out instead of lingering
+        prev_counts = self.last_commit_count
+        ahead_counts = {}
 
+        for short_name, ahead, behind in branches:
             if ahead > 0:
-                short_name = b.replace(f"{self.remote}/", "")
-
                 if behind > 0:
                     diverged_branches.append((short_name, ahead, behind))
-                    self.log_msg(f"  {short_name}: +{ahead}/-{behind} (DIVERGED)")
+                    self.log_msg(_FMT_DIVERGED(short_name, ahead, behind))
                 else:
                     ahead_branches.append((short_name, ahead))
-                    self.log_msg(f"  {short_name}: +{ahead} commits")
+                    self.log_msg(_FMT_AHEAD(short_name, ahead))
+
+                ahead_counts[short_name] = ahead
 
-                prev = self.last_commit_count.get(short_name, 0)
-                if ahead > prev:
-                    new_commits_detected = True
-                self.last_commit_count[short_name] = ahead
+        self.last_commit_count = ahead_counts
+        new_commits_detected = any(
+            ahead > prev_counts.get(name, 0) for name, ahead in ahead_counts.items()
+        )
 
         if new_commits_detected:
             self.log_msg("New commit detected!")
@@ -171,30 +223,20 @@ class RepoTabSyncMixin:
 
         if total_problematic == 0:
             behind_branches = []
-            for b in branches:
-                behind = commits_behind(f"{self.remote}/{self.main}", b,
-                                       cwd=self.repo_path, git=self.git)
+            for short_name, _, behind in branches:
                 if behind > 0:
-                    short_name = b.replace(f"{self.remote}/", "")
                     behind_branches.append((short_name, behind))
-                    self.log_msg(f"  {short_name}: -{behind} commits (behind)")
+                    self.log_msg(_FMT_BEHIND(short_name, behind))
 
             if behind_branches:
                 self.log_msg(f"Synchronizing {len(behind_branches)} branches behind…")
-                for branch_name, _ in behind_branches:
-                    refspec = f"{self.main}:{branch_name}"
-                    self.log_msg(f"git push {self.remote} {refspec}")
-                    code, out, err = run_git(
-                        [self.git, "push", self.remote, refspec],
-                        cwd=self.repo_path
-                    )
-                    if code != 0:
-                        self.log_msg(f"ERROR push {branch_name}: {err}")
-                        self.set_state("ERROR")
-                        self.sync_error = True
-                        self.stop_polling()
-                        return
-                    self.log_msg(out if out else "  (ok)")
+                failed, err = self._push_main_to([name for name, _ in behind_branches])
+                if failed:
+                    self.log_msg(f"ERROR push {', '.join(failed)}: {err}")
+                    self.set_state("ERROR")
+                    self.sync_error = True
+                    self.stop_polling()
+                    return
 
                 self.set_state("Sync OK")
                 self.set_info(f"{len(behind_branches)} branches synchronized")
@@ -205,7 +247,8 @@ class RepoTabSyncMixin:
             self.set_state("Idle")
             self.set_info("All branches are synchronized")
             self.log_msg("Nothing to do")
-            self.last_commit_count.clear()
+            self._idle_fingerprint = fingerprint
+            self._idle_ticks = idle_ticks + 1
             return
 
         if len(diverged_branches) > 0 or len(ahead_branches) > 1:
@@ -213,8 +256,7 @@ class RepoTabSyncMixin:
             self.pending_branches = all_names
 
             self.log_msg("Checking modified files…")
-            disjoint = are_files_disjoint(all_names, f"{self.remote}/{self.main}",
-                                         self.remote, cwd=self.repo_path, git=self.git)
+            overlap = self.file_overlap(all_names)
 
             if len(diverged_branches) > 0:
                 diverged_names = [f"{b[0]} (+{b[1]}/-{b[2]})" for b in diverged_branches]
@@ -223,7 +265,7 @@ class RepoTabSyncMixin:
                 msg = f"Multiple branches: {', '.join(all_names)}"
 
             stop_branches = ", ".join(all_names)
-            if disjoint:
+            if overlap is None:
                 self.set_state("STOP — Merge possible")
                 self.set_info(f"Disjoint files. {msg}")
                 self.log_msg("Disjoint files — manual merge possible")
@@ -232,17 +274,14 @@ class RepoTabSyncMixin:
             else:
                 self.set_state("STOP — Human action required")
                 self.set_info(f"Potential file conflict. {msg}")
-                self.log_msg("STOP: common files detected")
+                self.log_msg(f"STOP: common files detected ({overlap[0]} / {overlap[1]})")
                 self.app.record_event(self.tab_name, get_short_head(self.repo_path, self.git), stop_branches)
             self.stop_polling()
             return
 
         leader, _ = ahead_branches[0]
         self.log_msg(f"git pull --ff-only {self.remote} {leader}")
-        code, out, err = run_git(
-            [self.git, "pull", "--ff-only", self.remote, leader],
-            cwd=self.repo_path
-        )
+        code, err = self._run_git_logged(["pull", "--ff-only", self.remote, leader])
         if code != 0:
             self.log_msg(f"ERROR pull: {err}")
             self.set_state("ERROR")
@@ -250,69 +289,228 @@ class RepoTabSyncMixin:
             self.sync_error = True
             self.stop_polling()
             return
-        self.log_msg(out if out else "  (ok)")
 
         if not self.push_main_and_branches():
             return
 
         self.last_commit_count[leader] = 0
         self.set_state("Sync OK")
-        branches = get_tracked_branches(self.remote, self.prefix,
-                                        cwd=self.repo_path, git=self.git)
-        other_count = len(branches) - 1
+        other_count = len(all_branches) - 1
         self.set_info(f"Pull from {leader}, push to {other_count} other branches")
         self.log_msg("Sync completed successfully")
         self.app.record_event(self.tab_name, get_short_head(self.repo_path, self.git), leader)
 
         # Play sound after successful sync
         if new_commits_detected:
-            threading.Thread(target=lambda: play_sound("commit"), daemon=True).start()
+            self.app.pool.submit(play_sound, "commit")
 
     def push_main_and_branches(self):
         """Push main and all enabled branches."""
         self.log_msg(f"git push {self.remote} {self.main}")
-        code, out, err = run_git([self.git, "push", self.remote, self.main],
-                                cwd=self.repo_path)
+        code, err = self._run_git_logged(["push", self.remote, self.main])
         if code != 0:
             self.log_msg(f"ERROR push main: {err}")
             self.set_state("ERROR")
             self.sync_error = True
             self.stop_polling()
             return False
-        self.log_msg(out if out else "  (ok)")
-
-        all_branches = get_tracked_branches(self.remote, self.prefix,
-                                            cwd=self.repo_path, git=self.git)
 
         # Filter out disabled branches
         settings = load_global_settings()
         branch_states = settings.get("branch_update_enabled", {}).get(str(self.repo_path), {})
         default_enabled = settings.get("sync_new_branches_by_default", False)
 
-        for b in all_branches:
-            target = b.replace(f"{self.remote}/", "")
+        targets = []
+        for target in self.tracked_short_names():
             # Skip disabled branches
             if not branch_states.get(target, default_enabled):
                 self.log_msg(f"  {target}: skipped (sync disabled)")
                 continue
-            refspec = f"{self.main}:{target}"
-            self.log_msg(f"git push {self.remote} {refspec}")
-            code, out, err = run_git([self.git, "push", self.remote, refspec],
-                                    cwd=self.repo_path)
-            if code != 0:
-                self.log_msg(f"ERROR push {target}: {err}")
-                self.set_state("STOP — Push failed")
-                self.set_info(f"Push to {target} failed")
-                self.sync_error = True
-                self.stop_polling()
-                return False
-            self.log_msg(out if out else "  (ok)")
+            targets.append(target)
+
+        failed, err = self._push_main_to(targets)
+        if failed:
+            self.log_msg(f"ERROR push {', '.join(failed)}: {err}")
+            self.set_state("STOP — Push failed")
+            self.set_info(f"Push to {failed[0]} failed")
+            self.sync_error = True
+            self.stop_polling()
+            return False
 
         return True
 
+    def _run_git_logged(self, args):
+        """Run git args in the repo, streaming its output into the log
+        ("  (ok)" if it printed nothing). Returns (returncode, last
+        output line) — the error message when it failed."""
+        printed = False
+
+        def on_line(line):
+            nonlocal printed
+            printed = True
+            self.log_msg(f"  {line}")
+
+        code, last = run_git_stream([self.git, *args], on_line, cwd=self.repo_path)
+        if code == 0 and not printed:
+            self.log_msg("  (ok)")
+        return code, last
+
+    def _cache_branches(self, refs):
+        """Cache tracked refs ("origin/claude/x") along with their short
+        names ("claude/x"), stripped once here rather than by every
+        consumer. Returns the (refs, short names) tuples."""
+        refs = tuple(refs)
+        remote_prefix = f"{self.remote}/"
+        cached = (refs, tuple(b.removeprefix(remote_prefix) for b in refs))
+        self._branches_cache = cached
+        self._branches_stamp = self._remote_refs_stamp()
+        return cached
+
+    def _revalidate_branches(self):
+        """After a fetch: forget the cached branch list only if the
+        remote refs moved since it was taken. An idle repo's syncs often
+        return before the branch scan (nothing changed, fetch error…),
+        and the Repository menu relies on the cache staying filled."""
+        stamp = self._remote_refs_stamp()
+        if stamp is None or stamp != self._branches_stamp:
+            self._branches_cache = None
+
+    def _tracked(self):
+        cached = self._branches_cache
+        if cached is None:
+            cached = self._cache_branches(get_tracked_branches(
+                self.remote, self.prefix, cwd=self.repo_path, git=self.git
+            ))
+        return cached
+
+    def tracked_branches(self):
+        """Tracked remote branches ("origin/claude/x"), cached until the
+        next fetch — the list only changes when remote refs are fetched
+        (or a branch is deleted, see invalidate_branches)."""
+        return self._tracked()[0]
+
+    def tracked_short_names(self):
+        """tracked_branches() without the remote prefix ("claude/x"),
+        in the same order and cached with it."""
+        return self._tracked()[1]
+
+    def has_tracked_branches(self):
+        """Whether the cached branch list is non-empty; never runs git
+        (False while nothing is cached)."""
+        cached = self._branches_cache
+        return cached is not None and bool(cached[0])
+
+    def _remote_refs_stamp(self):
+        """Stat-only snapshot of the refs tracked_branches() is built
+        from (refs/remotes/<remote> tree and packed-refs), or None when
+        it can't be taken reliably. See _refs_fingerprint."""
+        env = repo_env(self.repo_path)
+        if env is None:
+            return None
+        git_dir = env["GIT_DIR"]
+        if os.path.exists(os.path.join(git_dir, "commondir")):
+            return None  # linked worktree: refs live elsewhere
+        stamps = [self.remote, self.prefix]
+        try:
+            try:
+                stamps.append(os.stat(os.path.join(git_dir, "packed-refs")).st_mtime_ns)
+            except FileNotFoundError:
+                stamps.append(0)
+            _stat_tree(os.path.join(git_dir, "refs", "remotes", self.remote), stamps)
+        except OSError:
+            return None
+        return tuple(stamps)
+
+    def _refs_fingerprint(self):
+        """Cheap stat-only snapshot of everything _do_sync's verdict
+        depends on, or None when it can't be taken reliably.
+
+        Git updates refs by renaming a lock file into place (or deleting
+        it), which bumps the mtime of the directory holding the ref, so
+        the mtimes of the refs/heads and refs/remotes/<remote> directory
+        trees, HEAD and packed-refs change whenever any ref does. The
+        settings file covers the per-branch enable switches.
+        """
+        env = repo_env(self.repo_path)
+        if env is None:
+            return None
+        git_dir = env["GIT_DIR"]
+        if os.path.exists(os.path.join(git_dir, "commondir")):
+            return None  # linked worktree: refs live elsewhere
+        stamps = [self.remote, self.main, self.prefix]
+        try:
+            for name in ("HEAD", "packed-refs"):
+                try:
+                    stamps.append(os.stat(os.path.join(git_dir, name)).st_mtime_ns)
+                except FileNotFoundError:
+                    stamps.append(0)
+            try:
+                stamps.append(os.stat(SETTINGS_FILE).st_mtime_ns)
+            except FileNotFoundError:
+                stamps.append(0)
+            _stat_tree(os.path.join(git_dir, "refs", "heads"), stamps)
+            _stat_tree(os.path.join(git_dir, "refs", "remotes", self.remote), stamps)
+        except OSError:
+            return None
+        return tuple(stamps)
+
+    def files_disjoint(self, names):
+        """True if the branches in names touch disjoint sets of files."""
+        return self.file_overlap(names) is None
+
+    def file_overlap(self, names):
+        """find_file_overlap over names, memoized on the refs involved:
+        the first pair of branches sharing a file, or None.
+
+        The answer only depends on the commits remote main and each
+        branch point to, so a quiet "STOP" state polled every cycle
+        costs a few cat-file lookups instead of N diffs.
+        """
+        main_ref = f"{self.remote}/{self.main}"
+        resolve = self.gsess.resolve
+        token = (resolve(main_ref),
+                 tuple(sorted((n, resolve(f"{self.remote}/{n}")) for n in names)))
+        cached = self._disjoint_cache
+        if cached is not None and cached[0] == token and token[0] is not None:
+            return cached[1]
+        overlap = find_file_overlap(names, main_ref, self.remote,
+                                    cwd=self.repo_path, git=self.git,
+                                    session=self.gsess, executor=self._pool)
+        self._disjoint_cache = (token, overlap)
+        return overlap
+
+    def invalidate_branches(self):
+        """Forget the cached branch list (after a branch deletion)."""
+        self._branches_cache = None
+
+    def _push_main_to(self, targets):
+        """Push main to every branch in targets with a single git push.
+
+        Main itself is pushed separately beforehand (push_main_and_branches)
+        so branches are only moved once main went through. Logs each
+        branch's status line and returns (failed_branches, stderr).
+        """
+        if not targets:
+            return [], ""
+        refspecs = [f"{self.main}:{target}" for target in targets]
+        self.log_msg(f"git push {self.remote} {' '.join(refspecs)}")
+        code, results, err = push_refspecs(self.remote, refspecs,
+                                           cwd=self.repo_path, git=self.git)
+        failed = []
+        for target in targets:
+            # No status line at all (auth/network failure): the exit code decides
+            ok, summary = results.get(target, (code == 0, ""))
+            if ok:
+                self.log_msg(f"  {target}: {summary or 'ok'}")
+            else:
+                failed.append(target)
+                if summary:
+                    self.log_msg(f"  {target}: {summary}")
+        return failed, err
+
     def manual_merge(self):
-        """Start manual merge in separate thread."""
-        threading.Thread(target=self._do_merge, daemon=True).start()
+        """Start manual merge on a worker thread."""
+        self.app.pool.submit(self._do_merge)
 
     def _do_merge(self):
         """Merge entry point with lock."""
@@ -321,7 +519,7 @@ class RepoTabSyncMixin:
         try:
             self._do_merge_impl()
         finally:
-            self.lock.release()
+            self._release_sync_lock()
 
     def _do_merge_impl(self):
         """Perform the actual merge operation."""
@@ -338,9 +536,8 @@ class RepoTabSyncMixin:
 
         for branch in branches:
             self.log_msg(f"git merge {self.remote}/{branch}")
-            code, out, err = run_git(
-                [self.git, "merge", f"{self.remote}/{branch}", "-m", f"Merge {branch}"],
-                cwd=self.repo_path
+            code, err = self._run_git_logged(
+                ["merge", f"{self.remote}/{branch}", "-m", f"Merge {branch}"]
             )
             if code != 0:
                 self.log_msg(f"ERROR merge {branch}: {err}")
@@ -350,7 +547,6 @@ class RepoTabSyncMixin:
                 self.sync_error = True
                 self.stop_polling()
                 return
-            self.log_msg(out if out else "  (ok)")
 
         if not self.push_main_and_branches():
             return
@@ -368,4 +564,4 @@ class RepoTabSyncMixin:
         """Trigger a manual sync."""
         if not self.git_healthy:
             return
-        threading.Thread(target=self.sync, daemon=True).start()
+        self.app.pool.submit(self.sync)
@@ -5,13 +5,27 @@ GitHerd — RepoTab UI mixin.
 Handles UI construction and log visibility.
 """
 
-import re
+from collections import deque
 import customtkinter as ctk
 
 
 class RepoTabUIMixin:
     """Mixin for UI construction and log management."""
 
+    LOG_BUFFER_MAX = 5000  # lines kept in the log queue / pre-display backlog
+
+    # CTkFonts shared by every tab: a tab's widgets are all built up
+    # front, but the fonts they use only once per app
+    _fonts = {}
+
+    @classmethod
+    def _shared_font(cls, size, weight="normal", family=None):
+        key = (size, weight, family)
+        font = cls._fonts.get(key)
+        if font is None:
+            font = cls._fonts[key] = ctk.CTkFont(family=family, size=size, weight=weight)
+        return font
+
     def _build_ui(self):
         """Build the UI for this repo tab."""
         if self.advanced_mode:
@@ -19,24 +33,83 @@ class RepoTabUIMixin:
         else:
             self._build_normal_ui()
 
-        # LOG TEXTBOX
+        # LOG TEXTBOX — the frame is cheap, the textbox (and its font)
+        # is only built the first time the tab is actually shown, so
+        # tabs that stay in the background at startup don't pay for it.
+        # Lines logged before that are kept in _log_backlog.
         self.log_frame = ctk.CTkFrame(self, fg_color="transparent")
         if self.log_visible:
             self.log_frame.pack(fill="both", expand=True, padx=10, pady=6)
 
+        self.log = None
+        # Both buffers keep only the newest LOG_BUFFER_MAX lines: a tab
+        # never shown, or a runaway burst, can't grow them without bound
+        self._log_backlog = deque(maxlen=self.LOG_BUFFER_MAX)
+        self._log_tags = set()  # color tags already configured on the textbox
+        self._log_menu = None  # right-click menu, built on first use
+        self._log_menu_colors = None  # app.menu_colors it was last styled with
+        self._log_queue = deque(maxlen=self.LOG_BUFFER_MAX)  # (time, text, color) waiting for _flush_log
+        self._log_flush_pending = False
+        self._log_flush_job = None  # after() id of the armed log flush
+        self.bind("<Map>", self._materialize_log, add="+")
+
+    def _materialize_log(self, event=None):
+        """Build the log textbox on first display and replay the backlog."""
+        if self.log is not None:
+            return
         self.log = ctk.CTkTextbox(
             self.log_frame,
-            font=ctk.CTkFont(family="Consolas", size=12),
-            height=250,
-            state="disabled"
+            font=self._shared_font(12, family="Consolas"),
+            height=250
         )
         self.log.pack(fill="both", expand=True)
 
+        # Left in the "normal" state so writing needs no configure()
+        # round trips; typing, pasting and deleting are swallowed here
+        # instead. Class bindings (copy, selection, cursor moves) only
+        # run when the handler doesn't return "break".
+        self.log._textbox.configure(insertwidth=0)  # no blinking cursor, as when disabled
+        self.log._textbox.bind("<Key>", self._block_log_edit)
+        for event in ("<<Paste>>", "<<PasteSelection>>", "<<Cut>>", "<<Clear>>"):
+            self.log._textbox.bind(event, lambda e: "break")
+
         # Right-click context menu on log
         self.log.bind("<Button-3>", self._on_log_right_click)
         # Also bind on internal text widget for clicks directly on text
         self.log._textbox.bind("<Button-3>", self._on_log_right_click)
 
+        backlog, self._log_backlog = self._log_backlog, deque(maxlen=self.LOG_BUFFER_MAX)
+        if backlog:
+            self._write_log_lines(backlog)
+
+    # Keys that edit a Text widget without typing a printable character
+    _LOG_EDIT_KEYS = frozenset(("BackSpace", "Delete", "Return", "KP_Enter"))
+    # Ctrl+D / K / O / T / H / I: Tk's Emacs-style edits (delete, kill
+    # line, open line, transpose, backspace, insert tab)
+    _LOG_EDIT_CTRL_KEYS = frozenset(("d", "k", "o", "t", "h", "i"))
+
+    def _block_log_edit(self, event):
+        """Drop keys that would edit the log; navigation, selection,
+        copy and focus traversal go through."""
+        keysym = event.keysym
+        if keysym in ("Tab", "ISO_Left_Tab"):
+            # The Text class binding would insert "\t" instead of moving
+            # the focus, so traverse here
+            if keysym == "ISO_Left_Tab" or event.state & 0x1:
+                target = event.widget.tk_focusPrev()
+            else:
+                target = event.widget.tk_focusNext()
+            if target is not None:
+                target.focus_set()
+            return "break"
+        if keysym in self._LOG_EDIT_KEYS:
+            return "break"
+        if event.state & 0x4:  # Control: select-all, copy, word moves…
+            return "break" if keysym.lower() in self._LOG_EDIT_CTRL_KEYS else None
+        if event.char and event.char.isprintable():
+            return "break"  # typing
+        return None
+
     def _build_advanced_ui(self):
         """Build compact UI for advanced mode."""
         # Combined frame: Log button left, status right
@@ -59,7 +132,7 @@ class RepoTabUIMixin:
         self.state_label = ctk.CTkLabel(
             status_frame,
             text="Starting…",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._shared_font(16, "bold")
         )
         self.state_label.pack(anchor="w")
 
@@ -69,7 +142,7 @@ class RepoTabUIMixin:
         self.info_label = ctk.CTkLabel(
             info_frame,
             text="Analyzing…",
-            font=ctk.CTkFont(size=13),
+            font=self._shared_font(13),
             wraplength=500
         )
         self.info_label.pack(side="left")
@@ -77,7 +150,7 @@ class RepoTabUIMixin:
         self.countdown_label = ctk.CTkLabel(
             info_frame,
             text="",
-            font=ctk.CTkFont(size=13),
+            font=self._shared_font(13),
             text_color="gray"
         )
         self.countdown_label.pack(side="left", padx=10)
@@ -86,7 +159,7 @@ class RepoTabUIMixin:
         self.tab_name_label = ctk.CTkLabel(
             info_frame,
             text="",
-            font=ctk.CTkFont(size=10),
+            font=self._shared_font(10),
             text_color="gray",
         )
         self.tab_name_label.pack(side="right", padx=10)
@@ -118,7 +191,7 @@ class RepoTabUIMixin:
         self.state_label = ctk.CTkLabel(
             top_bar,
             text="Starting…",
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=self._shared_font(16, "bold")
         )
         self.state_label.pack(anchor="w", padx=5)
 
@@ -129,7 +202,7 @@ class RepoTabUIMixin:
         self.info_label = ctk.CTkLabel(
             info_frame,
             text="Analyzing…",
-            font=ctk.CTkFont(size=13),
+            font=self._shared_font(13),
             wraplength=600
         )
         self.info_label.pack(side="left", padx=5)
@@ -137,7 +210,7 @@ class RepoTabUIMixin:
         self.countdown_label = ctk.CTkLabel(
             info_frame,
             text="",
-            font=ctk.CTkFont(size=13),
+            font=self._shared_font(13),
             text_color="gray"
         )
         self.countdown_label.pack(side="left", padx=10)
@@ -146,7 +219,7 @@ class RepoTabUIMixin:
         self.tab_name_label = ctk.CTkLabel(
             info_frame,
             text="",
-            font=ctk.CTkFont(size=10),
+            font=self._shared_font(10),
             text_color="gray",
         )
         self.tab_name_label.pack(side="right", padx=10)
@@ -216,15 +289,14 @@ class RepoTabUIMixin:
         preserved so a user-resized window keeps its width across log
         toggles.
         """
-        # Force geometry update and read current size+position BEFORE
-        # any pack changes.
-        self.app.update_idletasks()
-        geo = self.app.geometry()
-        match = re.match(r'(\d+)x(\d+)\+(-?\d+)\+(-?\d+)', geo)
-        if match:
-            cur_w = match.group(1)
-            x, y = match.group(3), match.group(4)
-        else:
+        # Read current size+position BEFORE any pack changes. No
+        # update_idletasks(): the window manager already reported the
+        # geometry, forcing a layout pass first only adds latency.
+        # Tk always reports "WxH+X+Y" (a negative offset as "+-N").
+        size, _, pos = self.app.geometry().partition("+")
+        cur_w = size.partition("x")[0]
+        x, _, y = pos.partition("+")
+        if not (cur_w.isdigit() and x.lstrip("-").isdigit() and y.lstrip("-").isdigit()):
             cur_w, x, y = "710", "100", "100"
 
         # Collapsed height: 189px normal, 151px advanced (+24 for status bar)
@@ -236,6 +308,8 @@ class RepoTabUIMixin:
             self.app.geometry(f"{cur_w}x{collapsed_height}+{x}+{y}")
         else:
             self.log_frame.pack(fill="both", expand=True, padx=10, pady=6)
+            if self.log is not None:
+                self.log.see("end")  # lines written while collapsed didn't scroll
             self.btn_toggle_log.configure(text="▼ Log")
             self.app.geometry(f"{cur_w}x774+{x}+{y}")
         self.log_visible = not self.log_visible
@@ -255,18 +329,56 @@ class RepoTabUIMixin:
         widgets from a non-main thread is not safe (it intermittently
         deadlocks the Tcl interpreter → full UI freeze), so route it
         through the main-thread dispatcher.
+
+        A sync sets the status several times in a row (Sync…, then the
+        outcome): updates are held for STATUS_FLUSH_MS and only the last
+        text of each label is drawn, so on a fast sync the intermediate
+        states never render.
         """
-        self.app.ui_call(lambda t=text: self.state_label.configure(text=t))
+        self._queue_status("state_label", text)
 
     def set_info(self, text):
         """Thread-safe update of the info label (second status line)."""
-        self.app.ui_call(lambda t=text: self.info_label.configure(text=t))
+        self._queue_status("info_label", text)
+
+    STATUS_FLUSH_MS = 40  # coalescing window for status label updates
+
+    def _queue_status(self, label, text):
+        self._pending_status[label] = text
+        if not self._status_flush_pending:
+            self._status_flush_pending = True
+            self.app.ui_call(self._schedule_status_flush)
+
+    def _schedule_status_flush(self):
+        """Arm the status flush (main thread)."""
+        self._status_flush_job = self.after(self.STATUS_FLUSH_MS, self._flush_status)
+
+    def _flush_status(self):
+        """Draw the latest pending text of each status label."""
+        self._status_flush_job = None
+        # Same ordering as _flush_log: a text queued after the flag is
+        # reset is either popped below or arms a new flush
+        self._status_flush_pending = False
+        while self._pending_status:
+            label, text = self._pending_status.popitem()
+            self._set_label_text(getattr(self, label), text)
+
+    @staticmethod
+    def _set_label_text(label, text):
+        """Configure label only if its text changes (UI thread).
+
+        Most polling ticks report the same "Idle" state again; CTkLabel
+        keeps its text on the Python side, so comparing is free while a
+        configure goes through Tcl and redraws the label.
+        """
+        if label.cget("text") != text:
+            label.configure(text=text)
 
     def disable_tab(self, error_msg):
         """Disable tab due to error. Thread-safe."""
         self.polling = False
-        self.app.ui_call(lambda: self.state_label.configure(text="ERROR — Git not working"))
-        self.app.ui_call(lambda msg=error_msg: self.info_label.configure(text=msg))
+        self.set_state("ERROR — Git not working")
+        self.set_info(error_msg)
         self.app.ui_call(lambda: self.btn_poll.configure(state="disabled"))
         self.app.ui_call(lambda: self.btn_sync.configure(state="disabled"))
         self.app.ui_call(lambda: self.btn_poll.configure(text="▶ Start polling"))
@@ -2,65 +2,14 @@
 """
 GitHerd — Resources module.
 
-Contains text resources like help text and constants.
+Loads text resources (help text) shipped next to the package.
 """
 
-HELP_TEXT = """GitHerd — Real-time Git branch synchronizer
+from functools import lru_cache
+from importlib.resources import files
 
-Keeps multiple Git branches aligned in real-time.
-Ideal for parallel AI coding sessions or any workflow
-with multiple active branches.
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-HANDLED CASES:
-
-┌─────────────────────────────────────────┬─────────────────────┐
-│ Situation                               │ Action              │
-├─────────────────────────────────────────┼─────────────────────┤
-│ Nothing to do                           │ Idle                │
-│ Local main ahead                        │ Auto push           │
-│ Branches behind main                    │ Auto push to sync   │
-│ 1 branch ahead (not diverged)           │ Fast-forward + push │
-│ 1+ diverged branch, disjoint files      │ Merge button        │
-│ 1+ diverged branch, common files        │ STOP                │
-│ 2+ branches ahead, disjoint files       │ Merge button        │
-│ 2+ branches ahead, common files         │ STOP                │
-└─────────────────────────────────────────┴─────────────────────┘
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-MULTI-REPO:
-
-- File menu > Add repository (Ctrl+O)
-- Each tab manages a repository independently
-- Repositories are saved between sessions
-
-TAB INDICATORS:
-- Green background = Polling active
-- Gray background = Polling inactive
-- Red background = STOP (action required or error)
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-KEYBOARD SHORTCUTS:
-
-- Ctrl+O : Add repository
-- Ctrl+S : Stop all polling
-- Ctrl+R : Restart
-- Ctrl+Q : Quit
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-ADVANCED MODE (Settings):
-
-When enabled, UI is simplified:
-- Single click on tab: select, or toggle polling if selected
-- Double click on tab: sync now (any tab)
-- Buttons hidden (use menu or tab clicks)
-- Log toggle next to status
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-https://github.com/Jacques66/GitHerd
-"""
+@lru_cache(maxsize=1)
+def help_text():
+    """Help dialog text, read from help.txt on first use."""
+    return files(__package__).joinpath("help.txt").read_text(encoding="utf-8")
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+GitHerd — State cache module.
+
+Keeps the ahead/behind counts and changed-file lists computed for a
+(main, tip) commit pair across runs, in a small SQLite database. A
+commit pair never changes, so an entry never goes stale: at startup,
+every branch that didn't move since the last session is answered
+without walking history or diffing again. Entries unused for a week
+are evicted.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+
+# Entries not read or written for this long are dropped at startup
+MAX_AGE_SECONDS = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    repo TEXT NOT NULL,
+    main_sha TEXT NOT NULL,
+    tip_sha TEXT NOT NULL,
+    ahead INTEGER,
+    behind INTEGER,
+    files BLOB,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (repo, main_sha, tip_sha)
+)
+"""
+
+
+class StateCache:
+    """Persistent (repo, main sha, tip sha) -> counts / files store.
+
+    Shared by all tabs; thread-safe. The database is opened lazily, on
+    the first query (from a worker, not the Tk thread). Any SQLite
+    error turns the cache off for the session: it's only a shortcut,
+    every answer can be recomputed from git.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = None
+        self._broken = False
+
+    def _conn(self):
+        """Open connection, or None if the cache is unusable."""
+        if self._db is None and not self._broken:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+                # Losing the last writes to a crash only costs a recount
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=OFF")
+                db.execute(_SCHEMA)
+                db.execute("DELETE FROM state WHERE updated_at < ?",
+                           (time.time() - MAX_AGE_SECONDS,))
+                db.commit()
+                self._db = db
+            except sqlite3.Error:
+                self._broken = True
+        return self._db
+
+    def _get(self, column, repo, main_sha, tip_sha):
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return None
+            try:
+                row = db.execute(
+                    f"SELECT {column} FROM state"
+                    " WHERE repo = ? AND main_sha = ? AND tip_sha = ?",
+                    (repo, main_sha, tip_sha)
+                ).fetchone()
+                if row is None or row[0] is None:
+                    return None
+                # Keep entries that are still in use out of eviction
+                db.execute(
+                    "UPDATE state SET updated_at = ?"
+                    " WHERE repo = ? AND main_sha = ? AND tip_sha = ?",
+                    (time.time(), repo, main_sha, tip_sha)
+                )
+                db.commit()
+                return row
+            except sqlite3.Error:
+                self._broken = True
+                return None
+
+    def _put(self, columns, values, repo, main_sha, tip_sha):
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return
+            updates = ", ".join(f"{c} = excluded.{c}" for c in columns)
+            try:
+                db.execute(
+                    f"INSERT INTO state (repo, main_sha, tip_sha, {', '.join(columns)},"
+                    f" updated_at) VALUES (?, ?, ?, {', '.join('?' * len(columns))}, ?)"
+                    f" ON CONFLICT (repo, main_sha, tip_sha) DO UPDATE SET {updates},"
+                    " updated_at = excluded.updated_at",
+                    (repo, main_sha, tip_sha, *values, time.time())
+                )
+                db.commit()
+            except sqlite3.Error:
+                self._broken = True
+
+    def get_counts(self, repo, main_sha, tip_sha):
+        """(ahead, behind) of tip vs main, or None if not cached."""
+        row = self._get("ahead, behind", repo, main_sha, tip_sha)
+        return (row[0], row[1]) if row is not None else None
+
+    def put_counts(self, repo, main_sha, tip_sha, counts):
+        self._put(("ahead", "behind"), counts, repo, main_sha, tip_sha)
+
+    def get_files(self, repo, main_sha, tip_sha):
+        """Files changed on tip since its fork from main (list of bytes
+        paths), or None if not cached."""
+        row = self._get("files", repo, main_sha, tip_sha)
+        if row is None:
+            return None
+        try:
+            data = zlib.decompress(row[0])
+        except zlib.error:
+            return None
+        return data.split(b"\0") if data else []
+
+    def put_files(self, repo, main_sha, tip_sha, files):
+        # NUL can't appear in a path; zlib shrinks long shared prefixes
+        blob = zlib.compress(b"\0".join(files))
+        self._put(("files",), (blob,), repo, main_sha, tip_sha)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._broken = True
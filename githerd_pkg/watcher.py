@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+GitHerd — Ref watcher module.
+
+Reacts to local ref changes (commits, resets, branch switches made in
+the working tree) through Linux inotify, so a polling tab syncs right
+away instead of at its next tick. Remote changes can't be seen this
+way: the polling loop's fetch keeps handling those.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import inotify_simple  # optional, Linux only
+except ImportError:
+    inotify_simple = None
+
+from .git_utils import invalidate_read_cache, repo_env
+
+# Filesystems where inotify doesn't see changes made from other hosts
+_REMOTE_FS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "fuse.sshfs", "9p", "afs"}
+
+# Events are ignored this long after a sync released the repo lock:
+# GitHerd's own merges/pulls move local refs too.
+SELF_CHANGE_GRACE = 2.0
+
+
+def _fs_type(path):
+    """Filesystem type of the mount holding path ("" if unknown)."""
+    best, fstype = "", ""
+    try:
+        with open("/proc/self/mounts", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mnt = parts[1].replace("\\040", " ")
+                if (path == mnt or path.startswith(mnt.rstrip("/") + "/")) \
+                        and len(mnt) >= len(best):
+                    best, fstype = mnt, parts[2]
+    except OSError:
+        pass
+    return fstype
+
+
+class RefWatcher:
+    """One inotify instance and reader thread shared by all tabs."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._wd_tab = {}  # watch descriptor -> tab
+        self._tab_wds = {}  # tab -> [watch descriptors]
+        self._gitdir_wds = set()  # wds on a git dir: only HEAD/packed-refs count
+        self._inotify = None
+        self._thread = None
+        self._closed = False
+        if inotify_simple is not None:
+            try:
+                self._inotify = inotify_simple.INotify()
+            except OSError:
+                self._inotify = None
+
+    @property
+    def available(self):
+        return self._inotify is not None
+
+    def watch(self, tab):
+        """Start watching tab's local refs. No-op if already watched,
+        inotify is unavailable or the repo is on a network filesystem
+        (the polling loop covers it alone then)."""
+        if not self.available or self._closed:
+            return
+        with self._lock:
+            if tab in self._tab_wds:
+                return
+        env = repo_env(tab.repo_path)
+        if env is None:
+            return
+        git_dir = env["GIT_DIR"]
+        if _fs_type(os.path.realpath(git_dir)) in _REMOTE_FS:
+            return
+
+        f = inotify_simple.flags
+        # Ref updates are lock-file renames (IN_MOVED_TO); loose refs can
+        # also be created or deleted. HEAD and packed-refs are renamed
+        # into the git dir itself, so that dir is watched for renames.
+        wds, dir_wd = [], None
+        try:
+            wds.append(self._inotify.add_watch(
+                os.path.join(git_dir, "refs", "heads"),
+                f.MODIFY | f.CREATE | f.MOVED_TO | f.DELETE
+            ))
+        except OSError:
+            pass  # e.g. a linked worktree has no refs/heads of its own
+        try:
+            dir_wd = self._inotify.add_watch(git_dir, f.MOVED_TO)
+            wds.append(dir_wd)
+        except OSError:
+            pass
+        if not wds:
+            return
+        with self._lock:
+            self._tab_wds[tab] = wds
+            for wd in wds:
+                self._wd_tab[wd] = tab
+            if dir_wd is not None:
+                self._gitdir_wds.add(dir_wd)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._read_loop, name="githerd-refwatch", daemon=True
+                )
+                self._thread.start()
+
+    def unwatch(self, tab):
+        """Stop watching tab (closed, moved or unhealthy)."""
+        with self._lock:
+            wds = self._tab_wds.pop(tab, [])
+            for wd in wds:
+                self._wd_tab.pop(wd, None)
+                self._gitdir_wds.discard(wd)
+        for wd in wds:
+            try:
+                self._inotify.rm_watch(wd)
+            except OSError:
+                pass  # already gone with its directory
+
+    def close(self):
+        """Stop the reader thread and release the inotify fd."""
+        self._closed = True
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def _read_loop(self):
+        names = ("HEAD", "packed-refs")
+        while not self._closed:
+            try:
+                # read_delay lets one git command's burst of ref writes
+                # arrive before we look, so it triggers a single sync
+                events = self._inotify.read(timeout=1000, read_delay=200)
+            except OSError:
+                return
+            touched = set()
+            with self._lock:
+                for ev in events:
+                    tab = self._wd_tab.get(ev.wd)
+                    if tab is None:
+                        continue
+                    if ev.wd in self._gitdir_wds and ev.name not in names:
+                        continue
+                    touched.add(tab)
+            for tab in touched:
+                self._trigger(tab)
+
+    def _trigger(self, tab):
+        """Queue a sync for tab, unless the change is GitHerd's own."""
+        # Something rewrote the refs: read results cached before the
+        # change (kept up to git_utils.READ_CACHE_TTL) no longer hold
+        invalidate_read_cache(tab.repo_path)
+        if not (tab.polling and tab.git_healthy) or tab.lock.locked():
+            return
+        if time.monotonic() - tab.last_sync_end < SELF_CHANGE_GRACE:
+            return
+        tab.note_activity()
+        tab.log_msg("Local refs changed — syncing")
+        self.app.pool.submit(tab.sync)
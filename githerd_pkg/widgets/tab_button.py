@@ -10,6 +10,18 @@ import customtkinter as ctk
 
 from ..config import load_global_settings
 
+# (font size, text) -> pixel width. Every button uses the same few
+# strings (indicator glyphs, repo names), and each font.measure is a
+# Tk round trip.
+_MEASURE_CACHE = {}
+
+
+def _measure(font, size, text):
+    width = _MEASURE_CACHE.get((size, text))
+    if width is None:
+        width = _MEASURE_CACHE[size, text] = font.measure(text)
+    return width
+
 
 class TabButton(tk.Frame):
     """Tab button with indicator overlay.
@@ -19,6 +31,10 @@ class TabButton(tk.Frame):
     Rounded corners drawn on canvas.
     """
 
+    # CTkFonts by size, shared by every button: font_zoom only changes
+    # through rebuild_ui, which recreates the buttons anyway
+    _fonts = {}
+
     def __init__(self, master, text, command=None, **kwargs):
         # Extract specific parameters
         self.fg_color = kwargs.pop("fg_color", "#333333")
@@ -33,23 +49,31 @@ class TabButton(tk.Frame):
         self.countdown_text = ""
 
         self._hover = False
+        self._drawn_size = None  # (width, height) of the last full _draw
         self._border_width = 0
         self._border_color = None
 
-        # Get font_zoom from global settings
-        self.font_zoom = load_global_settings().get("font_zoom", 1.0)
+        # The app passes its font_zoom: reading settings.json here would
+        # parse it once per tab at startup
+        self.font_zoom = kwargs.pop("font_zoom", None)
+        if self.font_zoom is None:
+            self.font_zoom = load_global_settings().get("font_zoom", 1.0)
         self.base_font_size = 13
 
         # Apply zoom to height and corner radius
         self.btn_height = int(base_height * self.font_zoom)
         self.corner_radius = int(base_corner_radius * self.font_zoom)
 
+        # Fonts and widths are looked up once here, not on every redraw
+        # (hover, countdown tick…)
+        self._font_size = int(self.base_font_size * self.font_zoom)
+        self._font = self._get_font(self._font_size)
+        self._countdown_font = self._get_font(max(8, int(9 * self.font_zoom)))
+        self._indicator_space = self._measure("⭯") + self.indicator_margin
+        self._text_width = self._measure(text)
+
         # Calculate width: text + indicator space + padding
-        font = self._get_font()
-        text_width = font.measure(text) if text else 50
-        indicator_space = font.measure("⭯") + self.indicator_margin
-        padding = int(30 * self.font_zoom)
-        self.btn_width = text_width + indicator_space + padding
+        self.btn_width = self._button_width()
 
         # Parent background color (for transparent corners)
         try:
@@ -73,6 +97,11 @@ class TabButton(tk.Frame):
         )
         self.canvas.pack(fill="both", expand=True)
 
+        # Text color follows the appearance mode; looked up here and on
+        # mode changes rather than on every redraw
+        self._text_color = self._text_color_for(ctk.get_appearance_mode())
+        ctk.AppearanceModeTracker.add(self._on_appearance_mode, self)
+
         # Bindings
         self.canvas.bind("<Button-1>", self._on_click)
         self.canvas.bind("<Enter>", self._on_enter)
@@ -81,41 +110,75 @@ class TabButton(tk.Frame):
         self.canvas.bind("<Configure>", self._on_configure)
 
     def _on_map(self, event=None):
-        """Called when widget becomes visible."""
-        self.after(50, self._draw)
+        """Called when widget becomes visible.
+
+        Drawn right away: the geometry manager has sized the canvas by
+        the time it is mapped. Should it still report 1x1, _draw is a
+        no-op and the <Configure> that follows draws it.
+        """
+        self._draw()
 
     def _on_configure(self, event=None):
         """Called when widget changes size."""
         self._draw()
 
-    def _get_font(self):
-        """Return font with zoom applied."""
-        size = int(self.base_font_size * self.font_zoom)
-        return ctk.CTkFont(size=size)
+    @staticmethod
+    def _text_color_for(mode):
+        return "#ffffff" if mode == "Dark" else "#000000"
+
+    def _on_appearance_mode(self, mode):
+        """AppearanceModeTracker callback ("Dark" / "Light")."""
+        color = self._text_color_for(mode)
+        if color != self._text_color:
+            self._text_color = color
+            self._draw()
+
+    def _get_font(self, size=None):
+        """Return the shared font of that size (default: zoomed base size)."""
+        if size is None:
+            size = int(self.base_font_size * self.font_zoom)
+        font = TabButton._fonts.get(size)
+        if font is None:
+            font = TabButton._fonts[size] = ctk.CTkFont(size=size)
+        return font
+
+    def _measure(self, text):
+        """Pixel width of text in the button font (cached)."""
+        return _measure(self._font, self._font_size, text)
+
+    def _button_width(self):
+        """Text + indicator space + padding."""
+        text_width = self._text_width if self.text else 50
+        return text_width + self._indicator_space + int(30 * self.font_zoom)
+
+    @staticmethod
+    def _rounded_points(x1, y1, x2, y2, r):
+        """Outline of a rounded rectangle for a smooth=True polygon.
+
+        Each straight edge's ends are doubled so the spline keeps them
+        straight; the rectangle corners act as control points and round
+        the corners off. One canvas item instead of 2 rectangles + 4
+        arcs (arcs are Tk's slowest primitive).
+        """
+        return (
+            x1 + r, y1, x1 + r, y1, x2 - r, y1, x2 - r, y1,
+            x2, y1,
+            x2, y1 + r, x2, y1 + r, x2, y2 - r, x2, y2 - r,
+            x2, y2,
+            x2 - r, y2, x2 - r, y2, x1 + r, y2, x1 + r, y2,
+            x1, y2,
+            x1, y2 - r, x1, y2 - r, x1, y1 + r, x1, y1 + r,
+            x1, y1,
+        )
 
-    def _draw_rounded_rect(self, x1, y1, x2, y2, radius, fill, outline=""):
-        """Draw a rounded rectangle with arcs."""
+    def _draw_rounded_rect(self, x1, y1, x2, y2, radius, fill, outline="", tags=()):
+        """Draw a filled rounded rectangle."""
         r = min(radius, (x2-x1)//2, (y2-y1)//2)
         if r < 2:
-            self.canvas.create_rectangle(x1, y1, x2, y2, fill=fill, outline=outline)
+            self.canvas.create_rectangle(x1, y1, x2, y2, fill=fill, outline=outline, tags=tags)
             return
-
-        d = 2 * r  # diameter
-
-        # Horizontal center rectangle
-        self.canvas.create_rectangle(x1 + r, y1, x2 - r, y2, fill=fill, outline="", width=0)
-        # Vertical center rectangle
-        self.canvas.create_rectangle(x1, y1 + r, x2, y2 - r, fill=fill, outline="", width=0)
-
-        # Rounded corners with create_arc
-        # Top-left
-        self.canvas.create_arc(x1, y1, x1 + d, y1 + d, start=90, extent=90, fill=fill, outline="", style="pieslice")
-        # Top-right
-        self.canvas.create_arc(x2 - d, y1, x2, y1 + d, start=0, extent=90, fill=fill, outline="", style="pieslice")
-        # Bottom-right
-        self.canvas.create_arc(x2 - d, y2 - d, x2, y2, start=270, extent=90, fill=fill, outline="", style="pieslice")
-        # Bottom-left
-        self.canvas.create_arc(x1, y2 - d, x1 + d, y2, start=180, extent=90, fill=fill, outline="", style="pieslice")
+        self.canvas.create_polygon(self._rounded_points(x1, y1, x2, y2, r),
+                                   smooth=True, fill=fill, outline=outline, tags=tags)
 
     def _draw_rounded_border(self, x1, y1, x2, y2, radius, color, width):
         """Draw a rounded border (outline only)."""
@@ -123,23 +186,8 @@ class TabButton(tk.Frame):
         if r < 2:
             self.canvas.create_rectangle(x1, y1, x2, y2, outline=color, width=width)
             return
-
-        # Straight lines
-        # Top
-        self.canvas.create_line(x1 + r, y1, x2 - r, y1, fill=color, width=width)
-        # Bottom
-        self.canvas.create_line(x1 + r, y2, x2 - r, y2, fill=color, width=width)
-        # Left
-        self.canvas.create_line(x1, y1 + r, x1, y2 - r, fill=color, width=width)
-        # Right
-        self.canvas.create_line(x2, y1 + r, x2, y2 - r, fill=color, width=width)
-
-        d = 2 * r
-        # Corner arcs (style=ARC for outline only)
-        self.canvas.create_arc(x1, y1, x1 + d, y1 + d, start=90, extent=90, outline=color, width=width, style="arc")
-        self.canvas.create_arc(x2 - d, y1, x2, y1 + d, start=0, extent=90, outline=color, width=width, style="arc")
-        self.canvas.create_arc(x2 - d, y2 - d, x2, y2, start=270, extent=90, outline=color, width=width, style="arc")
-        self.canvas.create_arc(x1, y2 - d, x1 + d, y2, start=180, extent=90, outline=color, width=width, style="arc")
+        self.canvas.create_polygon(self._rounded_points(x1, y1, x2, y2, r),
+                                   smooth=True, fill="", outline=color, width=width)
 
     def _on_click(self, event=None):
         """Handle click."""
@@ -149,16 +197,30 @@ class TabButton(tk.Frame):
     def _on_enter(self, event=None):
         """Hover - change color."""
         self._hover = True
-        self._draw()
+        self._recolor()
 
     def _on_leave(self, event=None):
         """End hover - restore color."""
         self._hover = False
-        self._draw()
+        self._recolor()
+
+    def _recolor(self):
+        """Refill the background items in place. Hover and state color
+        changes don't need the full rebuild _draw does (no-op if nothing
+        is drawn yet)."""
+        bg_color = self.hover_color if self._hover else self.fg_color
+        self.canvas.itemconfigure("bg", fill=bg_color)
 
     def _draw(self):
-        """Draw rounded button, centered text and indicator."""
+        """Draw rounded button, centered text and indicator.
+
+        Full rebuild: only needed on size, text or border changes. The
+        background items are tagged "bg", the indicator "indicator" and
+        the countdown "countdown" so _recolor, set_indicator and
+        set_countdown can update them alone.
+        """
         self.canvas.delete("all")
+        self._drawn_size = None
 
         width = self.canvas.winfo_width()
         height = self.canvas.winfo_height()
@@ -170,15 +232,11 @@ class TabButton(tk.Frame):
         bg_color = self.hover_color if self._hover else self.fg_color
 
         # Draw rounded rectangle (button background)
-        self._draw_rounded_rect(1, 1, width - 1, height - 1, self.corner_radius, fill=bg_color)
+        self._draw_rounded_rect(1, 1, width - 1, height - 1, self.corner_radius, fill=bg_color, tags="bg")
 
-        # Text color
-        text_color = "#ffffff" if ctk.get_appearance_mode() == "Dark" else "#000000"
+        text_color = self._text_color
 
-        font = self._get_font()
-
-        # Calculate main text width
-        text_width = font.measure(self.text)
+        font = self._font
 
         # Centered Y position
         y_center = height // 2
@@ -195,30 +253,28 @@ class TabButton(tk.Frame):
             anchor="center"
         )
 
-        # Draw indicator if present
-        if self.indicator:
-            char_width = font.measure(self.indicator)
-            x_indicator = (width // 2) - (text_width // 2) - self.indicator_margin - (char_width // 2)
-
-            self.canvas.create_text(
-                x_indicator, y_center,
-                text=self.indicator,
-                fill=text_color,
-                font=font,
-                anchor="center"
-            )
-
-        # Tiny countdown in bottom-right corner (only when polling active)
-        if self.countdown_text:
-            cd_size = max(8, int(9 * self.font_zoom))
-            cd_font = ctk.CTkFont(size=cd_size)
-            self.canvas.create_text(
-                width - 6, height - 4,
-                text=self.countdown_text,
-                fill="#ffffff",
-                font=cd_font,
-                anchor="se"
-            )
+        # Indicator (empty text when none): always created so
+        # set_indicator only has to change its text and position
+        self.canvas.create_text(
+            self._indicator_x(width), y_center,
+            text=self.indicator,
+            fill=text_color,
+            font=font,
+            anchor="center",
+            tags="indicator"
+        )
+        self._drawn_size = (width, height)
+
+        # Tiny countdown in bottom-right corner (empty unless polling):
+        # always created so set_countdown only has to change its text
+        self.canvas.create_text(
+            width - 6, height - 4,
+            text=self.countdown_text,
+            fill="#ffffff",
+            font=self._countdown_font,
+            anchor="se",
+            tags="countdown"
+        )
 
         # Draw rounded border if active
         if self._border_width > 0 and self._border_color:
@@ -227,37 +283,61 @@ class TabButton(tk.Frame):
     def configure(self, **kwargs):
         """Configure the button."""
         text_changed = False
+        # Colors alone are applied in place; anything else redraws.
+        # Values equal to the current ones (state refreshes re-send
+        # them often) change nothing.
+        rebuild = False
         if "text" in kwargs:
-            self.text = kwargs.pop("text")
-            text_changed = True
+            text = kwargs.pop("text")
+            if text != self.text:
+                self.text = text
+                text_changed = rebuild = True
         if "fg_color" in kwargs:
             self.fg_color = kwargs.pop("fg_color")
         if "hover_color" in kwargs:
             self.hover_color = kwargs.pop("hover_color")
         if "border_width" in kwargs:
-            self._border_width = kwargs.pop("border_width")
+            border_width = kwargs.pop("border_width")
+            if border_width != self._border_width:
+                self._border_width = border_width
+                rebuild = True
         if "border_color" in kwargs:
-            self._border_color = kwargs.pop("border_color")
+            border_color = kwargs.pop("border_color")
+            if border_color != self._border_color:
+                self._border_color = border_color
+                rebuild = True
 
         # Recalculate width if text changed
         if text_changed:
-            font = self._get_font()
-            text_width = font.measure(self.text) if self.text else 50
-            indicator_space = font.measure("⭯") + self.indicator_margin
-            padding = int(30 * self.font_zoom)
-            self.btn_width = text_width + indicator_space + padding
+            self._text_width = self._measure(self.text)
+            self.btn_width = self._button_width()
             # Resize frame and canvas
             super().configure(width=self.btn_width)
             self.canvas.configure(width=self.btn_width)
 
         if kwargs:
             super().configure(**kwargs)
-        self._draw()
+            rebuild = True
+        if rebuild:
+            self._draw()
+        else:
+            self._recolor()
+
+    def _indicator_x(self, width):
+        """Center x of the indicator, just left of the centered text."""
+        char_width = self._measure(self.indicator) if self.indicator else 0
+        return (width // 2) - (self._text_width // 2) - self.indicator_margin - (char_width // 2)
 
     def set_indicator(self, indicator=""):
         """Set indicator to display (e.g., '⭯', '●', '')."""
+        if indicator == self.indicator:
+            return  # re-sent on every state refresh
         self.indicator = indicator
-        self._draw()
+        if self._drawn_size is None:
+            return  # not drawn yet: _draw will use it
+        width, height = self._drawn_size
+        self.canvas.coords("indicator", self._indicator_x(width), height // 2)
+        self.canvas.itemconfigure("indicator", text=indicator)
 
     def set_countdown(self, seconds):
         """Set the tiny countdown number in the bottom-right corner.
@@ -268,7 +348,7 @@ class TabButton(tk.Frame):
         if new_text == self.countdown_text:
             return
         self.countdown_text = new_text
-        self._draw()
+        self.canvas.itemconfigure("countdown", text=new_text)
 
     def bind(self, sequence, func, add=None):
         """Bind on canvas too."""
@@ -277,5 +357,6 @@ class TabButton(tk.Frame):
 
     def destroy(self):
         """Destroy widget properly."""
+        ctk.AppearanceModeTracker.remove(self._on_appearance_mode)
         self.canvas.destroy()
         super().destroy()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+GitHerd — Worker pool module.
+
+A small thread pool for the app's background jobs. Same interface as
+concurrent.futures.ThreadPoolExecutor (submit, map, shutdown), but its
+workers are daemon threads: ThreadPoolExecutor joins its workers at
+interpreter exit, so quitting during a sync, merge or fetch would keep
+the process alive (window already gone) until git returns or times
+out. Like the one-thread-per-job code this replaced, exiting never
+waits for a job still running.
+"""
+
+import queue
+import threading
+from concurrent.futures import Executor, Future
+
+
+class DaemonPool(Executor):
+    """Thread pool of up to max_workers daemon threads, started on
+    demand and reused while there is work."""
+
+    def __init__(self, max_workers, thread_name_prefix="githerd"):
+        self._max_workers = max_workers
+        self._prefix = thread_name_prefix
+        self._queue = queue.SimpleQueue()  # (future, fn, args, kwargs), or None to stop a worker
+        self._idle = threading.Semaphore(0)  # one release per worker waiting for a job
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            future = Future()
+            self._queue.put((future, fn, args, kwargs))
+            # An idle worker picks it up; otherwise start one, up to the cap
+            if not self._idle.acquire(blocking=False) and len(self._threads) < self._max_workers:
+                t = threading.Thread(target=self._work, daemon=True,
+                                     name=f"{self._prefix}_{len(self._threads)}")
+                t.start()
+                self._threads.append(t)
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            del item
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            del future, fn, args, kwargs  # don't pin the last job's data while idle
+            self._idle.release()
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[0].cancel()
+            for _ in self._threads:
+                self._queue.put(None)
+            threads = list(self._threads)
+        if wait:
+            for t in threads:
+                t.join()